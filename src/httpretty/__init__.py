@@ -24,17 +24,29 @@
 # OTHER DEALINGS IN THE SOFTWARE.
 from __future__ import annotations
 
+from httpretty.core import CallbackCache
 from httpretty.core import EmptyRequestHeaders
 from httpretty.core import Entry
 from httpretty.core import HTTPrettyRequest
 from httpretty.core import HTTPrettyRequestEmpty
+from httpretty.core import ResponseTemplate
+from httpretty.core import ScheduledBody
+from httpretty.core import ServerSentEvents
+from httpretty.core import SyntheticBody
 from httpretty.core import URIInfo
 from httpretty.core import URIMatcher
+from httpretty.core import WeightedResponses
 from httpretty.core import get_default_thread_timeout
+from httpretty.core import get_json_encoder
+from httpretty.core import get_max_descriptors
+from httpretty.core import get_max_workers
 from httpretty.core import httprettified
 from httpretty.core import httprettized
 from httpretty.core import httpretty
 from httpretty.core import set_default_thread_timeout
+from httpretty.core import set_json_encoder
+from httpretty.core import set_max_descriptors
+from httpretty.core import set_max_workers
 from httpretty.errors import HTTPrettyError
 from httpretty.errors import UnmockedError
 
@@ -121,5 +133,17 @@ __all__ = [
     "URIMatcher",
     "URIInfo",
     "Entry",
+    "ResponseTemplate",
+    "SyntheticBody",
+    "ScheduledBody",
+    "ServerSentEvents",
+    "WeightedResponses",
+    "CallbackCache",
     "get_default_thread_timeout",
+    "set_json_encoder",
+    "get_json_encoder",
+    "set_max_descriptors",
+    "get_max_descriptors",
+    "set_max_workers",
+    "get_max_workers",
 ]
@@ -23,23 +23,37 @@
 # OTHER DEALINGS IN THE SOFTWARE.
 from __future__ import annotations
 
+import _socket
+import base64
 import codecs
+import collections
+import concurrent.futures
 import contextlib
+import copy
 import functools
+import gzip
 import hashlib
+import heapq
+import inspect
 import io
 import itertools
 import json
 import logging
+import os
+import random
 import re
 import socket
-import tempfile
 import threading
 import time
+import zlib
 
 from datetime import datetime
 from datetime import timedelta
+from datetime import timezone
+from email.utils import format_datetime
+from email.utils import parsedate_to_datetime
 from errno import EAGAIN
+from errno import EMFILE
 from functools import partial
 from http.server import BaseHTTPRequestHandler
 from urllib.parse import parse_qs
@@ -54,47 +68,238 @@ from httpretty.errors import HTTPrettyError
 from httpretty.errors import UnmockedError
 from httpretty.http import STATUSES
 from httpretty.http import HttpBaseClass
-from httpretty.http import last_requestline
+from httpretty.http import etag_matches
+from httpretty.http import keeps_alive
+from httpretty.http import parse_accept_encoding
+from httpretty.http import parse_range
 from httpretty.http import parse_requestline
+from httpretty.http import status_has_body
 from httpretty.utils import decode_utf8
 from httpretty.utils import utf8
 
 
 class __internals__:
     thread_timeout = 0.1  # https://github.com/gabrielfalcao/HTTPretty/issues/430
-    temp_files = []
-    threads = []
+    json_encoder = None
+    # pipes held by fake sockets, by id() so that a pipe that was
+    # closed can't be mistaken for a new one that got the same
+    # descriptor numbers
+    descriptors = {}
+    idle_descriptors = []
+    max_descriptors = None
+    max_idle_descriptors = 32
+    descriptors_lock = threading.Lock()
+    # pairs of closed or garbage-collected fake sockets. They are
+    # queued without taking descriptors_lock because the garbage
+    # collector can run a __del__ finalizer while the lock is held,
+    # and moved back to the pool the next time it is used
+    released_descriptors = collections.deque()
+    creating_descriptors = 0
+    # callbacks run in a pool of worker threads shared by all fake
+    # sockets
+    workers = None
+    max_workers = 32
+    # streaming bodies are pulled by threads of their own, started
+    # on demand, so that a stalled stream never holds a worker
+    streams = None
+    workers_lock = threading.Lock()
+    scheduler = None
 
     @classmethod
     def cleanup_sockets(cls):
-        cls.cleanup_temp_files()
+        cls.cleanup_descriptors()
         cls.cleanup_threads()
 
     @classmethod
     def cleanup_threads(cls):
-        for t in cls.threads:
-            t.join(cls.thread_timeout)
-            if t.is_alive():
-                raise socket.timeout(cls.thread_timeout)
+        """cancels the callbacks still waiting for a worker, gives the
+        running ones the default thread timeout to finish and reports
+        the ones that are past their deadline"""
+        workers = cls.workers
+        if workers is None:
+            return
+
+        concurrent.futures.wait(workers.cancel_queued(), cls.thread_timeout)
+        for lateness in cls.overdue_work():
+            logger.warning(
+                f"a response callback is still running {lateness:.3f} seconds "
+                "after its deadline, it keeps its worker until it returns"
+            )
+
+    @classmethod
+    def overdue_work(cls):
+        """
+        :returns: list with how many seconds each piece of work still running is past its deadline
+        """
+        workers = cls.workers
+        if workers is None:
+            return []
+        return workers.overdue()
+
+    @classmethod
+    def get_workers(cls):
+        with cls.workers_lock:
+            if cls.workers is None:
+                cls.workers = WorkerPool(cls.max_workers)
+            return cls.workers
+
+    @classmethod
+    def get_streams(cls):
+        with cls.workers_lock:
+            if cls.streams is None:
+                cls.streams = WorkerPool(None, name="httpretty-stream")
+            return cls.streams
+
+    @classmethod
+    def submit(cls, target, timeout):
+        """runs ``target`` in the shared worker pool, with a deadline
+        ``timeout`` seconds after it starts running that is reported
+        by :py:meth:`cleanup_threads` when missed.
+
+        Work is never abandoned: callers that stop waiting for it at
+        its deadline leave it to finish on its worker.
+
+        :param target: a callable without arguments
+        :param timeout: seconds, ``None`` for no deadline
+        :returns: a :py:class:`concurrent.futures.Future`
+        """
+        return cls.get_workers().submit(target, timeout)
 
     @classmethod
-    def create_thread(cls, *args, **kwargs):
-        return threading.Thread(*args, **kwargs)
+    def set_max_workers(cls, count):
+        with cls.workers_lock:
+            cls.max_workers = count
+            if cls.workers is not None:
+                cls.workers.resize(count)
 
     @classmethod
-    def cleanup_temp_files(cls):
-        for fd in cls.temp_files[:]:
+    def get_scheduler(cls):
+        if cls.scheduler is None:
+            cls.scheduler = Scheduler()
+        return cls.scheduler
+
+    @classmethod
+    def close_descriptor(cls, pair):
+        for fd in pair:
             try:
-                fd.close()
-            except Exception as e:
-                logger.debug(f"error closing file {fd}: {e}")
-            cls.temp_files.remove(fd)
+                os.close(fd)
+            except OSError as e:
+                logger.debug(f"error closing descriptor {fd}: {e}")
+
+    @classmethod
+    def cleanup_descriptors(cls):
+        """closes the idle pairs, the ones still held by fake sockets
+        are left to them: their numbers could otherwise be reused by
+        the process while the sockets still write to them"""
+        with cls.descriptors_lock:
+            pairs = cls.collect_released_descriptors() + cls.idle_descriptors
+            cls.idle_descriptors.clear()
+
+        for pair in pairs:
+            cls.close_descriptor(pair)
 
     @classmethod
-    def create_temp_file(cls):
-        fd = tempfile.TemporaryFile()  # noqa: SIM115
-        cls.temp_files.append(fd)
-        return fd
+    def collect_released_descriptors(cls):
+        """moves the pairs released since the last call back to the
+        idle pool, must be called with ``descriptors_lock`` held
+
+        :returns: list of the pairs that don't fit in the pool, to be closed once the lock is released
+        """
+        overflow = []
+        while cls.released_descriptors:
+            pair = cls.released_descriptors.popleft()
+            if cls.descriptors.pop(id(pair), None) is not pair:
+                # released twice
+                continue
+
+            if len(cls.idle_descriptors) < cls.max_idle_descriptors:
+                cls.idle_descriptors.append(pair)
+            else:
+                overflow.append(pair)
+
+        return overflow
+
+    @classmethod
+    def drain_descriptor(cls, pair):
+        with contextlib.suppress(OSError):
+            while os.read(pair[0], 64):
+                pass
+
+    @classmethod
+    def create_descriptor(cls):
+        """hands out a connected pair of non-blocking descriptors,
+        recycling one released by a closed fake socket when possible.
+
+        The first one lends its descriptor number to a fake socket and
+        the second one is written to in order to make it readable, see
+        :py:meth:`fakesock.socket.update_readiness`. A socket pair is
+        always writable, like a fake socket that accepts every send,
+        and falls back to a pipe on platforms without
+        :py:func:`socket.socketpair` in C.
+
+        :returns: a 2-item tuple of descriptor numbers
+        """
+        pair = None
+        with cls.descriptors_lock:
+            overflow = cls.collect_released_descriptors()
+            in_use = len(cls.descriptors) + cls.creating_descriptors
+            exhausted = (
+                cls.max_descriptors is not None and in_use >= cls.max_descriptors
+            )
+            if not exhausted and cls.idle_descriptors:
+                pair = cls.idle_descriptors.pop()
+                cls.descriptors[id(pair)] = pair
+            elif not exhausted:
+                # counted against the budget while created below
+                cls.creating_descriptors += 1
+
+        for extra in overflow:
+            cls.close_descriptor(extra)
+
+        if exhausted:
+            raise OSError(
+                EMFILE,
+                f"HTTPretty reached its budget of {cls.max_descriptors} descriptors "
+                "for fake sockets, see httpretty.set_max_descriptors()",
+            )
+
+        if pair is not None:
+            # a pair goes back to the pool readable, drained now that
+            # it can't be handed out again
+            cls.drain_descriptor(pair)
+            return pair
+
+        # created without holding the lock, see released_descriptors
+        try:
+            pair = cls.new_descriptor()
+        finally:
+            with cls.descriptors_lock:
+                cls.creating_descriptors -= 1
+                if pair is not None:
+                    cls.descriptors[id(pair)] = pair
+
+        return pair
+
+    @classmethod
+    def new_descriptor(cls):
+        if hasattr(_socket, "socketpair"):
+            # the C function, socket.socketpair would create fake sockets
+            first, second = _socket.socketpair()
+            pair = (first.detach(), second.detach())
+        else:
+            pair = os.pipe()
+
+        for fd in pair:
+            with contextlib.suppress(OSError):
+                os.set_blocking(fd, False)
+        return pair
+
+    @classmethod
+    def release_descriptor(cls, pair):
+        """queues the descriptor of a closed or garbage-collected fake
+        socket for the pool, it is safe to call from finalizers because
+        it doesn't take any lock"""
+        cls.released_descriptors.append(pair)
 
 
 def set_default_thread_timeout(timeout):
@@ -114,6 +319,72 @@ def get_default_thread_timeout():
     return __internals__.thread_timeout
 
 
+def set_max_workers(count):
+    """sets how many worker threads run response callbacks at the same
+    time, shared by all fake sockets. Callbacks beyond that wait for a
+    free worker, their timeout starts once they run. Callbacks still
+    running past their timeout don't count against the limit.
+
+    :param count: int
+    """
+    if count < 1:
+        raise ValueError(f"HTTPretty needs at least one worker, got {count}")
+    __internals__.set_max_workers(count)
+
+
+def get_max_workers():
+    """
+    :returns: the maximum number of worker threads that run response callbacks
+    """
+    return __internals__.max_workers
+
+
+def set_max_descriptors(limit):
+    """caps the number of real file descriptors that fake sockets
+    hold at the same time, :py:class:`OSError` with ``EMFILE`` is raised
+    by ``fileno()`` beyond it
+
+    :param limit: int or ``None`` for no limit
+    """
+    __internals__.max_descriptors = limit
+
+
+def get_max_descriptors():
+    """
+    :returns: the maximum number of real file descriptors held by fake sockets, ``None`` when unlimited
+    """
+    return __internals__.max_descriptors
+
+
+def set_json_encoder(encoder):
+    """sets the function used to encode ``dict`` and ``list`` response
+    bodies, e.g. :py:func:`orjson.dumps`
+
+    :param encoder: a callable taking the object and returning bytes or str, ``None`` restores the default encoder
+    """
+    __internals__.json_encoder = encoder
+
+
+def get_json_encoder():
+    """gets the function used to encode ``dict`` and ``list`` response bodies
+
+    :returns: callable
+    """
+    return __internals__.json_encoder or default_json_encoder
+
+
+def default_json_encoder(obj):
+    """encodes ``obj`` as JSON with :py:mod:`orjson` when it is installed,
+    falling back to :py:func:`json.dumps`
+
+    :returns: bytes
+    """
+    if orjson is not None:
+        return orjson.dumps(obj)
+
+    return json.dumps(obj).encode("utf-8")
+
+
 SOCKET_GLOBAL_DEFAULT_TIMEOUT = socket._GLOBAL_DEFAULT_TIMEOUT
 old_socket = socket.socket
 old_socketpair = getattr(socket, "socketpair", None)
@@ -158,6 +429,11 @@ try:
     import _ssl
 except ImportError:
     _ssl = None
+
+try:  # pragma: no cover
+    import orjson
+except ImportError:
+    orjson = None
 # used to handle error caused by ndg-httpsclient
 pyopenssl_overrides_inject = []
 pyopenssl_overrides_extract = []
@@ -383,16 +659,390 @@ class HTTPrettyRequestEmpty:
 
 class FakeSockFile:
     """Fake socket file descriptor. Under the hood all data is written in
-    a temporary file, giving it a real file descriptor number.
-
+    memory. A real file descriptor number is only created when
+    :py:meth:`fileno` is called, e.g. by ``select`` users, and it is
+    the one of the fake socket the file belongs to.
+
+    Mocked responses are not written to the file: once a producer is
+    set with :py:meth:`set_producer` reads are served straight from it,
+    keeping at most one chunk buffered in memory.
+
+    Every read that waits for a chunk that is not released yet (see
+    :py:class:`ScheduledBody`) or for a streaming body or a callback
+    to produce it is subject to the timeout of the socket and raises
+    :py:class:`socket.timeout` when it expires.
     """
 
     def __init__(self):
         self.file = None
-        self._fileno = None
+        self.socket = None
+        self._descriptor = None
+        self._producer = None
+        self._blocking = False
+        self._calls_back = False
+        self._workers = None
+        self._pending = None
+        self._pulling = None
+        self._exhausted = False
+        self._chunk = b""
+        self._offset = 0
         self.__closed__ = None
         self.reset()
 
+    def set_producer(self, chunks, blocking=False, calls_back=False):
+        """serves all subsequent reads from the given iterable of bytes
+
+        :param chunks: an iterable of bytes, usually :py:meth:`Entry.iter_response`
+        :param blocking: whether getting any chunk can block, it is then done by a thread of the stream pool so that the socket timeout applies to it
+        :param calls_back: whether getting the first chunk runs a response callback, it is then done in the shared worker pool
+        """
+        self._producer = iter(chunks)
+        self._blocking = blocking
+        self._calls_back = calls_back
+        self._workers = None
+        self._pending = None
+        self._pulling = None
+        self._exhausted = False
+        self._chunk = b""
+        self._offset = 0
+
+    @property
+    def has_producer(self):
+        return self._producer is not None
+
+    @property
+    def exhausted(self):
+        """whether the whole response was produced"""
+        if self._exhausted:
+            return True
+
+        # the end of a blocking producer is known once its last pull
+        # finished, before a read consumes it
+        pulled = self._pulling
+        return pulled is not None and pulled.done() and self._pulled_end(pulled)
+
+    @staticmethod
+    def _pulled_end(pulled):
+        """whether a finished pull ended the producer, a producer that
+        raised or was cancelled by :py:meth:`__internals__.cleanup_threads`
+        ends the response there, the error is logged by the worker"""
+        return (
+            pulled.cancelled()
+            or pulled.exception() is not None
+            or pulled.result() is None
+        )
+
+    @property
+    def timeout(self):
+        """the timeout of the socket this file belongs to, ``None``
+        blocks indefinitely"""
+        timeout = getattr(self.socket, "timeout", None)
+        if timeout is SOCKET_GLOBAL_DEFAULT_TIMEOUT:
+            return socket.getdefaulttimeout()
+        return timeout
+
+    @staticmethod
+    def _as_buffer(chunk):
+        """memoryview slices of a body are buffered as they are, so
+        that :py:meth:`readinto` copies them straight to the reader"""
+        if isinstance(chunk, memoryview):
+            return chunk
+        return utf8(chunk)
+
+    def _buffered(self):
+        return len(self._chunk) - self._offset
+
+    def _unread(self, data):
+        """puts back data that was read before a timeout interrupted
+        the read, so that the next read returns it again"""
+        if data:
+            self._chunk = data + self._chunk[self._offset :]
+            self._offset = 0
+
+    def _wait(self, release, timeout=SOCKET_GLOBAL_DEFAULT_TIMEOUT):
+        """waits for the release of the next chunk, or for a blocking
+        producer to produce it, within the socket timeout
+
+        :param release: :py:class:`threading.Event` or :py:class:`concurrent.futures.Future`
+        :param timeout: seconds, defaults to the timeout of the socket
+        :raises: :py:class:`BlockingIOError` when the socket is non-blocking
+        """
+        if timeout is SOCKET_GLOBAL_DEFAULT_TIMEOUT:
+            timeout = self.timeout
+
+        if isinstance(release, threading.Event):
+            self._pending = release
+            released = release.wait(timeout)
+        elif timeout == 0:
+            released = release.done()
+        else:
+            # the timeout starts once the work gets a worker
+            released = self._workers.wait(release, timeout)
+
+        if not released:
+            if timeout == 0:
+                raise BlockingIOError(EAGAIN, "Resource temporarily unavailable")
+            raise socket.timeout("timed out")
+        self._pending = None
+
+    def _start_pull(self, timeout=SOCKET_GLOBAL_DEFAULT_TIMEOUT):
+        """pulls the next item of a blocking producer in a worker,
+        unless a pull is already underway
+
+        The pull that runs a response callback goes to the shared
+        worker pool, the pulls of streaming bodies to the stream pool,
+        so that stalled streams never hold the workers of callbacks.
+
+        :param timeout: deadline of the pull, defaults to the timeout of the socket
+        :returns: a :py:class:`concurrent.futures.Future`
+        """
+        if timeout is SOCKET_GLOBAL_DEFAULT_TIMEOUT:
+            timeout = self.timeout
+
+        if self._pulling is None:
+            if self._calls_back:
+                self._workers = __internals__.get_workers()
+            else:
+                self._workers = __internals__.get_streams()
+                # streams are paced by their reader, not by a deadline
+                timeout = None
+
+            # the pull may be done before submit returns: the callback
+            # is attached first so that it never runs in this thread,
+            # which can hold the readiness lock of the socket
+            self._pulling = self._workers.submit(
+                functools.partial(next, self._producer, None),
+                timeout,
+                callback=lambda future: self._released(),
+            )
+        return self._pulling
+
+    def _needs_worker(self):
+        return self._blocking or self._calls_back
+
+    def _pull(self, timeout=SOCKET_GLOBAL_DEFAULT_TIMEOUT):
+        """
+        :returns: the next item of the producer, ``None`` once it is exhausted
+        """
+        if not self._needs_worker():
+            return next(self._producer, None)
+
+        # a pull that timed out is kept, its item is returned by the
+        # next call instead of pulling the producer again
+        self._wait(self._start_pull(timeout), timeout)
+        pulled, self._pulling = self._pulling, None
+        self._calls_back = False
+        if self._pulled_end(pulled):
+            return None
+        return pulled.result()
+
+    def _next_chunk(self, timeout=SOCKET_GLOBAL_DEFAULT_TIMEOUT):
+        """replaces the buffered chunk with the next non-empty chunk
+        of the producer
+
+        :param timeout: seconds, defaults to the timeout of the socket
+        :returns: bool - ``False`` when the producer is exhausted
+        """
+        if self._pending is not None:
+            self._wait(self._pending, timeout)
+
+        for chunk in iter(functools.partial(self._pull, timeout), None):
+            if isinstance(chunk, threading.Event):
+                self._wait(chunk, timeout)
+            elif chunk:
+                self._chunk = self._as_buffer(chunk)
+                self._offset = 0
+                return True
+
+        self._chunk = b""
+        self._offset = 0
+        self._exhausted = True
+        return False
+
+    def is_readable(self, prefetch=True):
+        """whether a read would return data, or the end of the
+        response, without waiting
+
+        :param prefetch: pulls the next chunk of the producer when nothing is buffered, to tell whether it was released yet
+        """
+        if self._producer is None:
+            return self.file.tell() < len(self.file.getbuffer())
+
+        if self._buffered() or self._exhausted:
+            return True
+
+        if self._pending is not None:
+            return self._pending.is_set()
+
+        if self._pulling is not None and not self._pulling.done():
+            return False
+
+        if not prefetch:
+            return True
+
+        while True:
+            if self._needs_worker() and not self._start_pull().done():
+                return False
+
+            chunk = self._pull()
+            if chunk is None:
+                break
+
+            if isinstance(chunk, threading.Event):
+                self._pending = chunk
+                if hasattr(chunk, "add_callback"):
+                    chunk.add_callback(self._released)
+                return chunk.is_set()
+
+            if chunk:
+                self._chunk = self._as_buffer(chunk)
+                self._offset = 0
+                return True
+
+        self._exhausted = True
+        return True
+
+    def _released(self):
+        if isinstance(self.socket, fakesock.socket) and self.socket.fd is self:
+            self.socket.update_readiness(prefetch=False)
+
+    def read1(self, size=-1):
+        if self._producer is None:
+            return self.file.read1(size)
+
+        if not self._buffered() and not self._next_chunk():
+            return b""
+
+        if size is None or size < 0:
+            size = self._buffered()
+
+        end = self._offset + min(size, self._buffered())
+        data = bytes(self._chunk[self._offset : end])
+        self._offset = end
+        return data
+
+    def read(self, size=-1):
+        if self._producer is None:
+            return self.file.read(size)
+
+        pieces = []
+        if size is None or size < 0:
+            try:
+                data = self.read1()
+                while data:
+                    pieces.append(data)
+                    data = self.read1()
+            except socket.timeout:
+                self._unread(b"".join(pieces))
+                raise
+
+            return b"".join(pieces)
+
+        remaining = size
+        try:
+            while remaining > 0:
+                data = self.read1(remaining)
+                if not data:
+                    break
+                pieces.append(data)
+                remaining -= len(data)
+        except socket.timeout:
+            self._unread(b"".join(pieces))
+            raise
+
+        return b"".join(pieces)
+
+    def readinto(self, buffer):
+        if self._producer is None:
+            return self.file.readinto(buffer)
+
+        view = memoryview(buffer).cast("B")
+        total = 0
+        while total < len(view):
+            try:
+                if not self._buffered() and not self._next_chunk():
+                    break
+            except socket.timeout:
+                self._unread(bytes(view[:total]))
+                raise
+
+            size = min(len(view) - total, self._buffered())
+            end = self._offset + size
+            view[total : total + size] = memoryview(self._chunk)[self._offset : end]
+            self._offset = end
+            total += size
+
+        return total
+
+    def readinto1(self, buffer):
+        """copies at most the currently buffered chunk into ``buffer``,
+        fetching the next one only when nothing is buffered"""
+        if self._producer is None:
+            return self.file.readinto1(buffer)
+
+        if not self._buffered() and not self._next_chunk():
+            return 0
+
+        view = memoryview(buffer).cast("B")
+        size = min(len(view), self._buffered())
+        end = self._offset + size
+        view[:size] = memoryview(self._chunk)[self._offset : end]
+        self._offset = end
+        return size
+
+    def readline(self, size=-1):
+        if self._producer is None:
+            return self.file.readline(size)
+
+        pieces = []
+        total = 0
+        while size is None or size < 0 or total < size:
+            try:
+                if not self._buffered() and not self._next_chunk():
+                    break
+            except socket.timeout:
+                self._unread(b"".join(pieces))
+                raise
+
+            if isinstance(self._chunk, memoryview):
+                self._chunk = bytes(self._chunk[self._offset :])
+                self._offset = 0
+
+            end = self._chunk.find(b"\n", self._offset)
+            end = len(self._chunk) if end == -1 else end + 1
+            if size is not None and size >= 0:
+                end = min(end, self._offset + size - total)
+
+            data = self._chunk[self._offset : end]
+            self._offset = end
+            pieces.append(data)
+            total += len(data)
+            if data.endswith(b"\n"):
+                break
+
+        return b"".join(pieces)
+
+    def peek(self, size=0):
+        if self._producer is None:
+            position = self.file.tell()
+            data = self.file.read(max(size, io.DEFAULT_BUFFER_SIZE))
+            self.file.seek(position)
+            return data
+
+        if not self._buffered():
+            self._next_chunk()
+
+        return bytes(self._chunk[self._offset :])
+
+    def prefetch(self, timeout):
+        """buffers the next chunk, like :py:meth:`peek`, waiting at most
+        ``timeout`` seconds instead of the socket timeout
+
+        :param timeout: seconds, ``None`` waits indefinitely
+        """
+        if self._producer is not None and not self._buffered():
+            self._next_chunk(timeout)
+
     def reset(self):
         if self.file:
             try:
@@ -401,15 +1051,11 @@ class FakeSockFile:
                 logger.debug(f"error closing file {self.file}: {e}")
             self.file = None
 
-        self.file = __internals__.create_temp_file()
-        self._fileno = self.file.fileno()
+        self.file = io.BytesIO()
         self.__closed__ = False
 
     def getvalue(self):
-        if hasattr(self.file, "getvalue"):
-            value = self.file.getvalue()
-        else:
-            value = self.file.read()
+        value = self.file.getvalue()
         self.file.seek(0)
         return value
 
@@ -431,7 +1077,12 @@ class FakeSockFile:
             logger.debug(f"error closing file {self.file}: {e}")
 
     def fileno(self):
-        return self._fileno
+        if isinstance(self.socket, fakesock.socket):
+            return self.socket.fileno()
+
+        if self._descriptor is None:
+            self._descriptor = __internals__.create_descriptor()
+        return self._descriptor[0]
 
     def __getattr__(self, name):
         try:
@@ -443,6 +1094,10 @@ class FakeSockFile:
         with contextlib.suppress(ValueError, AttributeError):
             self.close()
 
+        if self._descriptor is not None:
+            __internals__.release_descriptor(self._descriptor)
+            self._descriptor = None
+
         # Adding the line below as a potential fix of github issue #426
         # that seems to be a compatible the solution of #413
         self.file.close()
@@ -480,11 +1135,11 @@ class fakesock:
         """drop-in replacement for :py:class:`socket.socket`"""
 
         _entry = None
-        _read_buf = None
 
         debuglevel = 0
-        _sent_data = []
         is_secure = False
+        # bytes accepted by a single send() in non-blocking mode
+        send_buffer_size = 64 * 1024
 
         def __init__(
             self, family=socket.AF_INET, type=socket.SOCK_STREAM, proto=0, fileno=None
@@ -499,6 +1154,13 @@ class fakesock:
 
             self._address = FakeAddressTuple(self)
             self.__truesock_is_connected__ = False
+            # created on the first call to fileno()
+            self._descriptor = None
+            self._readable = False
+            self._readiness_lock = threading.Lock()
+            # the data that started the current request, body chunks
+            # sent afterwards are attributed to it
+            self._last_requestline = None
             self.fd = FakeSockFile()
             self.fd.socket = fileno or self
             self.timeout = socket._GLOBAL_DEFAULT_TIMEOUT
@@ -636,9 +1298,55 @@ class fakesock:
             return self.__truesock_is_connected__
 
         def fileno(self):
-            if self.truesock:
+            # a real socket that isn't connected, e.g. created to look
+            # up socket options, would always poll as hung up
+            if self.truesock and (not self.is_http or self.real_socket_is_connected()):
                 return self.truesock.fileno()
-            return self.fd.fileno()
+
+            if self._descriptor is None:
+                self._descriptor = __internals__.create_descriptor()
+                self._readable = False
+
+            # reads through makefile() don't go through this socket, so
+            # the readiness is refreshed whenever the descriptor is
+            # looked up, which select() and poll() do on every call
+            self.update_readiness()
+            return self._descriptor[0]
+
+        def is_readable(self, prefetch=True):
+            """whether a read would return data, or the end of the
+            response, without waiting"""
+            if self._entry is not None and not self.fd.has_producer:
+                return True
+
+            if not self.fd.is_readable(prefetch):
+                return False
+
+            # a connection kept alive waits for the next request once
+            # the response is over, instead of reaching its end
+            return not (self.fd.exhausted and self._entry.keep_alive)
+
+        def update_readiness(self, prefetch=True):
+            """makes the descriptor returned by :py:meth:`fileno`
+            readable exactly when a read would not wait, by writing a
+            byte to the other end of its pair or draining it, so that
+            ``select``, ``poll`` and :py:mod:`selectors` work with fake
+            sockets. Nothing happens until :py:meth:`fileno` is called.
+            """
+            descriptor = self.__dict__.get("_descriptor")
+            if descriptor is None:
+                return
+
+            with self._readiness_lock:
+                readable = self.is_readable(prefetch)
+                if readable == self._readable:
+                    return
+
+                if readable:
+                    os.write(descriptor[1], b"\0")
+                else:
+                    __internals__.drain_descriptor(descriptor)
+                self._readable = readable
 
         def close(self):
             if self.truesock:
@@ -646,36 +1354,79 @@ class fakesock:
                 self.truesock = None
                 self.__truesock_is_connected__ = False
 
+            self.release_descriptor()
+            self._last_requestline = None
+
+        def shutdown(self, how):
+            if not self.is_http and self.truesock:
+                return self.truesock.shutdown(how)
+
+            # the client stops using a mocked connection, e.g. urllib3
+            # when a response is released before being read, so it
+            # must not be reused
+            if self._entry is not None:
+                self._entry.keep_alive = False
+            self.update_readiness()
+
+        def release_descriptor(self):
+            # looked up in __dict__ because __getattr__ creates real
+            # sockets for missing attributes
+            descriptor = self.__dict__.get("_descriptor")
+            if descriptor is not None:
+                self._descriptor = None
+                __internals__.release_descriptor(descriptor)
+
+        def __del__(self):
+            with contextlib.suppress(Exception):
+                self.release_descriptor()
+
+        def start_response(self):
+            """Sets the response of the entry associated with this
+            socket as the producer of its file descriptor, unless that
+            was already done for the current request.
+
+            :returns: bool - whether a new response was started
+            """
+            if not self._entry or self.fd.has_producer:
+                return False
+
+            self.fd.set_producer(
+                self._entry.iter_response(),
+                blocking=self._entry.stream_may_block,
+                calls_back=self._entry.body_is_callable,
+            )
+            return True
+
         def makefile(self, mode="r", bufsize=-1):
-            """Returns this fake socket's own tempfile buffer.
+            """Returns this fake socket's own in-memory buffer.
 
             If there is an entry associated with the socket, the file
-            descriptor gets filled in with the entry data before being
-            returned.
+            descriptor reads the entry's response lazily, as the
+            client consumes it.
             """
             self._mode = mode
             self._bufsize = bufsize
 
-            if self._entry:
-                t = __internals__.create_thread(
-                    target=self._entry.fill_filekind, args=(self.fd,)
-                )
+            if not self.start_response():
+                return self.fd
 
-                # execute body callback and send http response in a
-                # thread, wait for thread to finish within the timeout
-                # set via socket.settimeout()
-                t.start()
-                if self.timeout == SOCKET_GLOBAL_DEFAULT_TIMEOUT:
-                    timeout = get_default_thread_timeout()
-                else:
-                    timeout = self.timeout
+            if not self._entry.may_block:
+                # static bodies and templates are produced without
+                # calling user code, so they don't need a thread
+                self.fd.peek()
+                return self.fd
+
+            if self.timeout == SOCKET_GLOBAL_DEFAULT_TIMEOUT:
+                timeout = get_default_thread_timeout()
+            else:
+                timeout = self.timeout
 
-                # fake socket timeout error by checking if the thread
-                # finished in time.
-                t.join(timeout)
-                if t.is_alive():
-                    # For more info check issue https://github.com/gabrielfalcao/HTTPretty/issues/430
-                    raise socket.timeout(timeout)
+            # execute body callback and produce the http response
+            # headers in a worker, fake socket timeout error if it
+            # doesn't finish within the timeout set via
+            # socket.settimeout(). For more info check issue
+            # https://github.com/gabrielfalcao/HTTPretty/issues/430
+            self.fd.prefetch(timeout)
 
             return self.fd
 
@@ -684,7 +1435,7 @@ class fakesock:
             when HTTPretty identifies that someone is trying to send
             non-http data.
 
-            The received bytes are written in this socket's tempfile
+            The received bytes are written in this socket's in-memory
             buffer so that HTTPretty can return it accordingly when
             necessary.
             """
@@ -703,7 +1454,7 @@ class fakesock:
                 raise UnmockedError(request=request)
 
             if not self.is_http:
-                self.truesock.setblocking(1)
+                # the real socket has the blocking mode of this one
                 return self.truesock.sendall(data, *args, **kw)
 
             sock = self.connect_truesock(request=request)
@@ -726,7 +1477,12 @@ class fakesock:
             self.fd.seek(0)
 
         def sendall(self, data, *args, **kw):
-            self._sent_data.append(data)
+            try:
+                return self.process_sent_data(data, *args, **kw)
+            finally:
+                self.update_readiness()
+
+        def process_sent_data(self, data, *args, **kw):
             self.fd = FakeSockFile()
             self.fd.socket = self
             if isinstance(data, str):
@@ -739,6 +1495,9 @@ class fakesock:
                 requestline, _ = data.split(b"\r\n", 1)
                 method, path, version = parse_requestline(decode_utf8(requestline))
                 is_parsing_headers = True
+                # only the header block is needed to parse the request
+                # again, the body of this chunk doesn't need to be kept
+                self._last_requestline = data.partition(b"\r\n\r\n")[0] + b"\r\n\r\n"
             except ValueError:
                 path = ""
                 is_parsing_headers = False
@@ -753,10 +1512,10 @@ class fakesock:
 
             self.fd.seek(0)
 
-            if not is_parsing_headers and len(self._sent_data) > 1:
-                headers = utf8(last_requestline(self._sent_data))
+            if not is_parsing_headers and self._last_requestline is not None:
+                headers = self._last_requestline
                 meta = self._entry.request.headers
-                body = utf8(self._sent_data[-1])
+                body = data
                 if meta.get("transfer-encoding", "") == "chunked":
                     if (
                         not body.isdigit()
@@ -797,7 +1556,6 @@ class fakesock:
             if not entries:
                 logger.debug(f"no entries matching {request}")
                 self._entry = None
-                self._read_buf = None
                 self.real_sendall(data, request=request)
                 return
 
@@ -817,33 +1575,76 @@ class fakesock:
             if not self.is_http and self.truesock:
                 self.truesock.settimeout(new_timeout)
 
+        def gettimeout(self):
+            if not self.is_http and self.truesock:
+                return self.truesock.gettimeout()
+            if self.timeout is SOCKET_GLOBAL_DEFAULT_TIMEOUT:
+                return socket.getdefaulttimeout()
+            return self.timeout
+
+        def setblocking(self, flag):
+            self.timeout = None if flag else 0.0
+            if not self.is_http and self.truesock:
+                self.truesock.setblocking(flag)
+
+        def getblocking(self):
+            return self.gettimeout() != 0.0
+
+        def ensure_readable(self):
+            """raises :py:class:`BlockingIOError` when the socket is
+            non-blocking and a read would wait, like real sockets do"""
+            if self.gettimeout() == 0.0 and not self.is_readable():
+                raise BlockingIOError(EAGAIN, "Resource temporarily unavailable")
+
         def send(self, data, *args, **kwargs):
+            if self.gettimeout() == 0.0:
+                # non-blocking sockets take what fits in their send
+                # buffer and let the caller send the rest later
+                data = memoryview(data)[: self.send_buffer_size]
             self.sendall(data, *args, **kwargs)
             return len(data)
 
         def sendto(self, *args, **kwargs):
             return self.forward_and_trace("sendto", *args, **kwargs)
 
-        def recvfrom_into(self, *args, **kwargs):
-            return self.forward_and_trace("recvfrom_into", *args, **kwargs)
+        def recvfrom_into(self, buffer, nbytes=0, *args, **kwargs):
+            if not self.is_http:
+                return self.forward_and_trace(
+                    "recvfrom_into", buffer, nbytes, *args, **kwargs
+                )
 
-        def recv_into(self, *args, **kwargs):
-            return self.forward_and_trace("recv_into", *args, **kwargs)
+            return self.recv_into(buffer, nbytes), None
+
+        def recv_into(self, buffer, nbytes=0, *args, **kwargs):
+            if not self.is_http:
+                return self.forward_and_trace(
+                    "recv_into", buffer, nbytes, *args, **kwargs
+                )
+
+            # copied straight from the buffered response chunk into the
+            # caller's buffer, like recv() it returns what is available
+            self.start_response()
+            view = memoryview(buffer).cast("B")
+            if nbytes:
+                view = view[:nbytes]
+            try:
+                self.ensure_readable()
+                return self.fd.readinto1(view)
+            finally:
+                self.update_readiness()
 
         def recvfrom(self, *args, **kwargs):
             return self.forward_and_trace("recvfrom", *args, **kwargs)
 
         def recv(self, buffersize=0, *args, **kwargs):
-            if not self._read_buf:
-                self._read_buf = io.BytesIO()
-
-            if self._entry:
-                self._entry.fill_filekind(self._read_buf)
-
-            if not self._read_buf:
-                raise UnmockedError(f"socket cannot recv(): {self!r}")
-
-            return self._read_buf.read(buffersize)
+            # the response is generated once per request and produced
+            # lazily, as it gets read
+            self.start_response()
+            try:
+                self.ensure_readable()
+                return self.fd.read1(buffersize)
+            finally:
+                self.update_readiness()
 
         def __getattr__(self, name):
             if name in ("getsockopt", "selected_alpn_protocol") and not self.truesock:
@@ -927,6 +1728,806 @@ def fake_getaddrinfo(host, port, family=None, socktype=None, proto=None, flags=N
     ]
 
 
+LAST_CHUNK = b"0\r\n\r\n"
+RESPONSE_CHUNK_SIZE = 64 * 1024
+"""maximum size of the slices in which static bodies are written to fake sockets"""
+
+
+COMPRESSORS = {
+    "gzip": functools.partial(gzip.compress, mtime=0),
+    "deflate": zlib.compress,
+}
+"""content-codings that :py:class:`Entry` can serve precompressed variants for"""
+
+
+def iter_slices(data, size):
+    """yields consecutive slices of at most ``size`` bytes from ``data``
+
+    :param data: bytes
+    :param size: int
+    """
+    if len(data) <= size:
+        yield data
+        return
+
+    for offset in range(0, len(data), size):
+        yield data[offset : offset + size]
+
+
+def encode_chunk(data):
+    """frames ``data`` as a single chunk of a ``Transfer-Encoding: chunked`` body
+
+    Empty chunks are dropped because a zero-length chunk marks the
+    end of the body.
+
+    :param data: bytes
+    :returns: bytes
+    """
+    if not data:
+        return b""
+
+    return b"%x\r\n%s\r\n" % (len(data), data)
+
+
+class ResponseTemplate:
+    """A response body rendered from the request without a callback.
+
+    The template is compiled once, when it is created, into literal
+    text and placeholders of the form ``${source.name}`` where
+    ``source`` is one of:
+
+    - ``path`` - a named group of the regex the URL was registered with
+    - ``query`` - the first value of a querystring parameter
+    - ``header`` - a request header
+    - ``body`` - a `JSON pointer <https://tools.ietf.org/html/rfc6901>`_ into the request body, e.g. ``${body./user/name}``
+
+    Missing values render as an empty string.
+
+    When the template is a ``dict`` or ``list`` it is encoded as a
+    JSON skeleton, placeholders must then be inside JSON strings and
+    the values are escaped accordingly.
+
+    .. testcode::
+
+       httpretty.register_uri(
+           httpretty.GET,
+           re.compile(r"https://api.example.com/users/(?P<user_id>\\d+)"),
+           body=httpretty.ResponseTemplate({"id": "${path.user_id}", "q": "${query.q}"}),
+       )
+
+    :param template: a string, ``dict`` or ``list``
+    """
+
+    placeholder_regex = re.compile(r"\$\{(path|query|header|body)\.([^}]*)\}")
+
+    def __init__(self, template):
+        self.is_json = isinstance(template, (dict, list))
+        if self.is_json:
+            template = decode_utf8(get_json_encoder()(template))
+
+        self.template = template
+        self.content_type = (
+            "application/json" if self.is_json else "text/plain; charset=utf-8"
+        )
+        self.parts = []
+        position = 0
+        for match in self.placeholder_regex.finditer(template):
+            self.parts.append((template[position : match.start()], match.groups()))
+            position = match.end()
+
+        self.tail = template[position:]
+
+    def __repr__(self):
+        return f"<ResponseTemplate {self.template!r}>"
+
+    def lookup(self, source, name, request, path_params):
+        if source == "path":
+            return path_params.get(name)
+
+        if source == "query":
+            values = request.querystring.get(name)
+            return values[0] if values else None
+
+        if source == "header":
+            return request.headers.get(name)
+
+        document = request.parsed_body
+        if not isinstance(document, (dict, list)):
+            try:
+                document = json.loads(decode_utf8(request.body))
+            except ValueError:
+                return None
+
+        for token in name.split("/")[1:]:
+            token = token.replace("~1", "/").replace("~0", "~")
+            try:
+                if isinstance(document, list):
+                    document = document[int(token)]
+                else:
+                    document = document[token]
+            except (KeyError, IndexError, ValueError, TypeError):
+                return None
+
+        return document
+
+    def render(self, request, url="", uri=None):
+        """renders the template for the given request
+
+        :param request: a :py:class:`~httpretty.core.HTTPrettyRequest`
+        :param url: the full url of the request
+        :param uri: the uri the entry was registered with, named groups are looked up when it is a regex
+        :returns: bytes
+        """
+        path_params = {}
+        if hasattr(uri, "search"):
+            match = uri.search(url)
+            if match:
+                path_params = match.groupdict()
+
+        pieces = []
+        for literal, (source, name) in self.parts:
+            pieces.append(literal)
+            value = self.lookup(source, name, request, path_params)
+            if value is None:
+                continue
+
+            if not isinstance(value, str):
+                value = json.dumps(value)
+            if self.is_json:
+                value = json.dumps(value)[1:-1]
+            pieces.append(value)
+
+        pieces.append(self.tail)
+        return utf8("".join(pieces))
+
+
+class SyntheticBody:
+    """A large response body generated from a small reusable buffer.
+
+    The body is never built in memory: a buffer of about
+    ``block_size`` bytes is computed once and the very same bytes
+    object is written to the client over and over, so throughput is
+    bound by the client rather than by HTTPretty.
+
+    .. testcode::
+
+       httpretty.register_uri(
+           httpretty.GET,
+           "https://example.com/10GB.bin",
+           body=httpretty.SyntheticBody(10 * 1024 ** 3, seed=42, checksum="sha256"),
+       )
+
+    :param size: length of the body in bytes
+    :param pattern: bytes repeated to fill the body, defaults to null bytes
+    :param seed: fills the body with pseudo-random bytes generated from this seed instead of a pattern, the random buffer repeats every ``block_size`` bytes
+    :param checksum: ``"md5"``, ``"sha1"`` or ``"sha256"`` to send the digest of the body in a ``Digest`` header. It is computed right away by hashing the whole body once, about a second per GiB, so that serving the body never waits for it
+    :param block_size: approximate size of the reusable buffer
+    """
+
+    digest_names = {"md5": "MD5", "sha1": "SHA", "sha256": "SHA-256"}
+
+    def __init__(
+        self,
+        size,
+        pattern=b"\x00",
+        seed=None,
+        checksum=None,
+        block_size=RESPONSE_CHUNK_SIZE,
+    ):
+        self.size = int(size)
+        if self.size < 0:
+            raise HTTPrettyError("The size of a synthetic body cannot be negative.")
+
+        if checksum is not None and checksum not in self.digest_names:
+            raise HTTPrettyError(
+                f"HTTPretty cannot compute {checksum!r} checksums, "
+                f"supported algorithms are {sorted(self.digest_names)}."
+            )
+
+        self.seed = seed
+        self.checksum = checksum
+        if seed is not None:
+            self.pattern = None
+            self.block = random.Random(seed).randbytes(block_size)
+        else:
+            self.pattern = utf8(pattern)
+            if not self.pattern:
+                raise HTTPrettyError("The pattern of a synthetic body cannot be empty.")
+            # whole repetitions only, so that every block starts at the
+            # beginning of the pattern
+            self.block = self.pattern * max(1, block_size // len(self.pattern))
+
+        self._digest = None if checksum is None else self.compute_digest()
+
+    def __repr__(self):
+        content = f"seed={self.seed!r}" if self.pattern is None else repr(self.pattern)
+        return f"<SyntheticBody {self.size} bytes of {content}>"
+
+    def __len__(self):
+        return self.size
+
+    def __iter__(self):
+        block = self.block
+        full_blocks, remainder = divmod(self.size, len(block))
+        for _ in range(full_blocks):
+            yield block
+
+        if remainder:
+            yield block[:remainder]
+
+    def compute_digest(self):
+        """hashes the whole body with the ``checksum`` algorithm
+
+        :returns: bytes
+        """
+        hasher = hashlib.new(self.checksum)
+        for chunk in self:
+            hasher.update(chunk)
+        return hasher.digest()
+
+    def digest(self):
+        """the digest of the whole body with the ``checksum`` algorithm,
+        computed when the body was created
+
+        :returns: bytes or ``None`` when no checksum was requested
+        """
+        return self._digest
+
+    def checksum_headers(self):
+        """
+        :returns: dict with the ``Digest`` header of the body, empty when no checksum was requested
+        """
+        digest = self.digest()
+        if digest is None:
+            return {}
+
+        value = base64.b64encode(digest).decode("ascii")
+        return {"digest": f"{self.digest_names[self.checksum]}={value}"}
+
+
+class Release(threading.Event):
+    """A :py:class:`threading.Event` that also calls back, used by
+    fake sockets to become readable as soon as a scheduled chunk is
+    released.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.callbacks = []
+
+    def add_callback(self, callback):
+        """registers a callback for when the event is set
+
+        The callback is never called from here, even if the event is
+        already set, since callers usually hold locks the callback
+        takes: they should check :py:meth:`is_set` once registered.
+        """
+        self.callbacks.append(callback)
+
+    def set(self):
+        super().set()
+        for callback in self.callbacks:
+            callback()
+
+
+class Scheduler:
+    """Releases the chunks of every :py:class:`ScheduledBody` being
+    served from a single thread shared by all fake sockets.
+
+    The thread only runs while there are pending releases, it exits
+    when the queue is empty and is started again by the next
+    :py:meth:`schedule` call.
+    """
+
+    def __init__(self):
+        self.condition = threading.Condition()
+        self.queue = []
+        self.sequence = itertools.count()
+        self.thread = None
+
+    def schedule(self, due):
+        """
+        :param due: a :py:func:`time.monotonic` deadline
+        :returns: a :py:class:`Release` that is set once the deadline is reached
+        """
+        event = Release()
+        if due <= time.monotonic():
+            event.set()
+            return event
+
+        with self.condition:
+            heapq.heappush(self.queue, (due, next(self.sequence), event))
+            if self.thread is None:
+                self.thread = threading.Thread(
+                    target=self.run, name="httpretty-scheduler", daemon=True
+                )
+                self.thread.start()
+            self.condition.notify()
+
+        return event
+
+    def run(self):
+        while True:
+            with self.condition:
+                now = time.monotonic()
+                released = []
+                while self.queue and self.queue[0][0] <= now:
+                    released.append(heapq.heappop(self.queue)[2])
+
+                if not released:
+                    if not self.queue:
+                        self.thread = None
+                        return
+                    self.condition.wait(self.queue[0][0] - now)
+                    continue
+
+            # set outside of the lock, the callbacks of the releases
+            # take locks of their own
+            for event in released:
+                event.set()
+
+
+class WorkerPool:
+    """Runs work on threads shared by all fake sockets.
+
+    At most ``max_workers`` threads run work that is within its
+    deadline, the rest waits in a queue. The deadline of a piece of
+    work starts when it starts running, and work still running past
+    its deadline doesn't count against the limit, so callbacks that
+    hang don't starve the others. Threads are started on demand and
+    exit after ``idle_timeout`` seconds without work.
+
+    :param max_workers: int, ``None`` for no limit
+    :param name: the name of the threads
+    :param idle_timeout: seconds
+    """
+
+    def __init__(self, max_workers, name="httpretty-worker", idle_timeout=1.0):
+        self.max_workers = max_workers
+        self.name = name
+        self.idle_timeout = idle_timeout
+        self.condition = threading.Condition()
+        self.queue = collections.deque()
+        # futures of the work being run, mapped to their deadline
+        self.running = {}
+        self.threads = 0
+        self.idle = 0
+
+    def submit(self, target, timeout, callback=None):
+        """
+        :param target: a callable without arguments
+        :param timeout: seconds from the moment ``target`` starts running, ``None`` for no deadline
+        :param callback: called with the future once it is done, unlike :py:meth:`concurrent.futures.Future.add_done_callback` it is never called by the thread that submits
+        :returns: a :py:class:`concurrent.futures.Future` with a ``started`` :py:class:`threading.Event`
+        """
+        future = concurrent.futures.Future()
+        future.started = threading.Event()
+        if callback is not None:
+            future.add_done_callback(callback)
+
+        with self.condition:
+            self.queue.append((future, target, timeout))
+            self.condition.notify()
+            self._spawn()
+        return future
+
+    def wait(self, future, timeout):
+        """waits for ``future`` to start running, for as long as it
+        takes to get a worker, then at most ``timeout`` seconds for
+        it to finish
+
+        :returns: bool - whether the future is done
+        """
+        while not future.started.is_set():
+            with self.condition:
+                # work that misses its deadline frees a worker
+                self._spawn()
+                now = time.monotonic()
+                deadlines = [
+                    deadline
+                    for deadline in self.running.values()
+                    if deadline is not None and deadline > now
+                ]
+            future.started.wait(min(deadlines) - now if deadlines else None)
+
+        return not concurrent.futures.wait([future], timeout).not_done
+
+    def resize(self, max_workers):
+        with self.condition:
+            self.max_workers = max_workers
+            self._spawn()
+
+    def overdue(self):
+        """
+        :returns: list with how many seconds each piece of work still running is past its deadline
+        """
+        with self.condition:
+            return self._lateness()
+
+    def cancel_queued(self):
+        """cancels the work waiting for a worker
+
+        :returns: list with the futures of the work still running
+        """
+        with self.condition:
+            queued = list(self.queue)
+            self.queue.clear()
+            running = list(self.running)
+
+        for future, _, _ in queued:
+            future.cancel()
+            future.started.set()
+        return running
+
+    def _lateness(self):
+        now = time.monotonic()
+        return [
+            now - deadline
+            for deadline in self.running.values()
+            if deadline is not None and deadline < now
+        ]
+
+    def _spawn(self):
+        """starts a thread for queued work that no idle thread will
+        take, within the limit, with the condition held"""
+        while len(self.queue) > self.idle:
+            busy = self.threads - self.idle - len(self._lateness())
+            if self.max_workers is not None and busy >= self.max_workers:
+                return
+
+            self.threads += 1
+            self.idle += 1
+            threading.Thread(target=self.run, name=self.name, daemon=True).start()
+
+    def run(self):
+        # the thread counts as idle whenever it has no work
+        while True:
+            with self.condition:
+                while not self.queue:
+                    if not self.condition.wait(self.idle_timeout) and not self.queue:
+                        self.idle -= 1
+                        self.threads -= 1
+                        return
+
+                future, target, timeout = self.queue.popleft()
+                if not future.set_running_or_notify_cancel():
+                    future.started.set()
+                    continue
+
+                self.idle -= 1
+                deadline = None if timeout is None else time.monotonic() + timeout
+                self.running[future] = deadline
+
+            future.started.set()
+            try:
+                result = target()
+            except BaseException as e:
+                logger.error("error producing a mocked response", exc_info=e)
+                future.set_exception(e)
+            else:
+                future.set_result(result)
+            finally:
+                with self.condition:
+                    self.running.pop(future, None)
+                    self.idle += 1
+
+
+class ScheduledBody:
+    """A streaming body whose chunks are released at given offsets, in
+    seconds from the moment the body starts being read.
+
+    Reads block until the next chunk is due, which emulates slow
+    servers and long polls. The waiting is driven by one
+    :py:class:`Scheduler` thread no matter how many responses are
+    being served, and the chunks are encoded once.
+
+    .. testcode::
+
+       httpretty.register_uri(
+           httpretty.GET,
+           "https://api.example.com/poll",
+           body=httpretty.ScheduledBody([(30, '{"events": []}')], content_type="application/json"),
+       )
+
+    :param chunks: an iterable of ``(offset, chunk)`` pairs, in order
+    :param content_type: the default ``Content-Type`` of the response
+    :param chunked: whether to use ``Transfer-Encoding: chunked`` so that clients can read each chunk as soon as it is released, defaults to ``True``
+    """
+
+    content_type = "application/octet-stream"
+
+    def __init__(self, chunks, content_type=None, chunked=True):
+        self.chunks = [(float(offset), self.encode(chunk)) for offset, chunk in chunks]
+        if content_type is not None:
+            self.content_type = content_type
+        self.chunked = chunked
+
+    def __repr__(self):
+        return f"<{self.__class__.__name__} {len(self.chunks)} chunks>"
+
+    def encode(self, chunk):
+        """
+        :returns: the bytes written to the client for ``chunk``
+        """
+        return utf8(chunk)
+
+    def __iter__(self):
+        scheduler = __internals__.get_scheduler()
+        start = time.monotonic()
+        for offset, chunk in self.chunks:
+            if offset > 0:
+                yield scheduler.schedule(start + offset)
+            yield chunk
+
+
+class ServerSentEvents(ScheduledBody):
+    """A ``text/event-stream`` body, see :py:class:`ScheduledBody`.
+
+    Events are either the data as a string or a ``dict`` with the
+    ``data``, ``event``, ``id`` and ``retry`` fields. Data that is a
+    ``dict`` or ``list`` itself is encoded as JSON.
+
+    .. testcode::
+
+       httpretty.register_uri(
+           httpretty.GET,
+           "https://api.example.com/notifications",
+           body=httpretty.ServerSentEvents([
+               (0, {"event": "hello", "data": {"user": 1}}),
+               (0.5, "ping"),
+           ]),
+       )
+
+    :param events: an iterable of ``(offset, event)`` pairs, in order
+    """
+
+    content_type = "text/event-stream"
+
+    def __init__(self, events, chunked=True):
+        super().__init__(events, chunked=chunked)
+
+    def encode(self, event):
+        if not isinstance(event, dict):
+            event = {"data": event}
+
+        lines = []
+        for field in ("id", "event", "retry"):
+            if event.get(field) is not None:
+                lines.append(f"{field}: {event[field]}")
+
+        data = event.get("data")
+        if isinstance(data, (dict, list)):
+            data = get_json_encoder()(data)
+        if data is not None:
+            lines.extend(f"data: {line}" for line in decode_utf8(data).split("\n"))
+
+        return utf8("\n".join(lines) + "\n\n")
+
+
+def build_alias_table(weights):
+    """builds the tables of `Vose's alias method
+    <https://www.keithschwarz.com/darts-dice-coins/>`_ to sample indexes
+    in proportion to ``weights`` in constant time
+
+    :param weights: list of non-negative numbers, at least one of them positive
+    :returns: a 2-item tuple with the list of probabilities and the list of aliases
+    """
+    count = len(weights)
+    total = float(sum(weights))
+    scaled = [weight * count / total for weight in weights]
+    probabilities = [1.0] * count
+    aliases = list(range(count))
+
+    small = [index for index, value in enumerate(scaled) if value < 1.0]
+    large = [index for index, value in enumerate(scaled) if value >= 1.0]
+    while small and large:
+        less = small.pop()
+        more = large.pop()
+        probabilities[less] = scaled[less]
+        aliases[less] = more
+        scaled[more] += scaled[less] - 1.0
+        if scaled[more] < 1.0:
+            small.append(more)
+        else:
+            large.append(more)
+
+    # whatever is left is only off from 1.0 by rounding errors
+    return probabilities, aliases
+
+
+class WeightedResponses:
+    """A mix of responses for one URI, each request gets one of them at
+    random in proportion to its weight.
+
+    Sampling takes constant time regardless of the number of responses
+    and the sequence is reproducible when a ``seed`` is given. It
+    restarts from the seed every time the mix is registered.
+
+    .. testcode::
+
+       httpretty.register_uri(
+           httpretty.GET,
+           "https://api.example.com/flaky",
+           responses=httpretty.WeightedResponses(
+               [
+                   (httpretty.Response("ok"), 95),
+                   (httpretty.Response("unavailable", status=503), 4),
+                   (httpretty.Response("slow down", status=429), 1),
+               ],
+               seed=42,
+           ),
+       )
+
+    :param responses: an iterable of ``(entry, weight)`` pairs, entries ideally created with :py:meth:`~httpretty.core.httpretty.Response`
+    :param seed: seed of the pseudo-random generator
+    """
+
+    def __init__(self, responses, seed=None):
+        pairs = list(responses)
+        weights = [weight for _, weight in pairs]
+        if not pairs or any(weight < 0 for weight in weights) or not sum(weights):
+            raise HTTPrettyError(
+                "HTTPretty needs at least one response with a positive weight "
+                "and no negative weights."
+            )
+
+        self.entries = [entry for entry, _ in pairs]
+        self.weights = weights
+        self.seed = seed
+        self.random = random.Random(seed)
+        self.probabilities, self.aliases = build_alias_table(weights)
+
+    def __repr__(self):
+        return f"<WeightedResponses {len(self.entries)} responses seed={self.seed!r}>"
+
+    def reset(self):
+        """restarts the sequence of chosen responses from the seed"""
+        self.random.seed(self.seed)
+
+    def choose(self):
+        """
+        :returns: one of the entries, picked in proportion to its weight
+        """
+        index = self.random.randrange(len(self.entries))
+        if self.random.random() >= self.probabilities[index]:
+            index = self.aliases[index]
+
+        return self.entries[index]
+
+
+class HeadersDict(dict):
+    """A :py:class:`dict` of HTTP headers whose keys are always
+    lowercase, so that ``headers["Content-Type"]`` and
+    ``headers["content-type"]`` refer to the same header.
+
+    Response headers are handed to callbacks as instances of this
+    class, so they don't need to be normalized again afterwards.
+    """
+
+    def __init__(self, *args, **kw):
+        super().__init__()
+        if len(args) == 1 and not kw and isinstance(args[0], HeadersDict):
+            # already normalized, skip the per-key lowercasing
+            super().update(args[0])
+        else:
+            self.update(*args, **kw)
+
+    def __setitem__(self, key, value):
+        super().__setitem__(key.lower(), value)
+
+    def __getitem__(self, key):
+        return super().__getitem__(key.lower())
+
+    def __delitem__(self, key):
+        super().__delitem__(key.lower())
+
+    def __contains__(self, key):
+        return super().__contains__(key.lower())
+
+    def get(self, key, default=None):
+        return super().get(key.lower(), default)
+
+    def pop(self, key, *default):
+        return super().pop(key.lower(), *default)
+
+    def setdefault(self, key, default=None):
+        return super().setdefault(key.lower(), default)
+
+    def update(self, *args, **kw):
+        for key, value in dict(*args, **kw).items():
+            self[key] = value
+
+    def copy(self):
+        return HeadersDict(self)
+
+
+CallbackCacheInfo = collections.namedtuple(
+    "CallbackCacheInfo",
+    ["hits", "misses", "evictions", "expirations", "maxsize", "currsize"],
+)
+
+
+class CallbackCache:
+    """Memoizes the ``(status, headers, body)`` returned by a callback body.
+
+    Pass it (or ``True`` for the defaults) as the ``memoize`` argument
+    of :py:meth:`~httpretty.core.httpretty.register_uri` to only invoke
+    expensive, deterministic callbacks once per request key.
+
+    :param maxsize: int - how many responses to keep, the least recently used is evicted first
+    :param ttl: float - seconds after which a cached response expires, ``None`` to never expire
+    :param key: a callable receiving ``(request, uri)`` and returning a hashable key, defaults to the method, url and body of the request
+
+    .. note:: the cached body is sent as is, so callbacks returning generators should not be memoized.
+    """
+
+    def __init__(self, maxsize=128, ttl=None, key=None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.key = key or self.default_key
+        self.items = collections.OrderedDict()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    @staticmethod
+    def default_key(request, uri):
+        return (request.method, uri, request.body)
+
+    def cache_info(self):
+        """
+        :returns: a :py:class:`CallbackCacheInfo` named tuple with the statistics of the cache
+        """
+        with self.lock:
+            return CallbackCacheInfo(
+                self.hits,
+                self.misses,
+                self.evictions,
+                self.expirations,
+                self.maxsize,
+                len(self.items),
+            )
+
+    def clear(self):
+        """removes all cached responses, keeping the statistics"""
+        with self.lock:
+            self.items.clear()
+
+    def get_or_call(self, callback, request, uri, headers):
+        """returns the cached response for the request, invoking
+        ``callback`` on a miss
+
+        :returns: a 3-item tuple ``(status, headers, body)``
+        """
+        key = self.key(request, uri)
+        with self.lock:
+            cached = self.items.get(key)
+            if cached is not None:
+                expires_at, (status, cached_headers, body) = cached
+                if expires_at is None or expires_at > time.monotonic():
+                    self.items.move_to_end(key)
+                    self.hits += 1
+                    return status, cached_headers.copy(), body
+
+                del self.items[key]
+                self.expirations += 1
+
+            self.misses += 1
+
+        status, headers, body = callback(request, uri, headers)
+        expires_at = None if self.ttl is None else time.monotonic() + self.ttl
+        with self.lock:
+            self.items[key] = (expires_at, (status, headers.copy(), body))
+            self.items.move_to_end(key)
+            while len(self.items) > self.maxsize:
+                self.items.popitem(last=False)
+                self.evictions += 1
+
+        return status, headers, body
+
+
 class Entry:
     """Created by :py:meth:`~httpretty.core.httpretty.register_uri` and
     stored in memory as internal representation of a HTTP
@@ -939,8 +2540,26 @@ class Entry:
         forcing_headers (dict): Overwrite response headers.
         status (int): The status code for the response, defaults to ``200``.
         streaming (bool): Whether should stream the response into chunks via generator.
+        chunked (bool): Whether to send the body with ``Transfer-Encoding: chunked`` framing.
+        encodings (tuple): Content-codings (``"gzip"``, ``"deflate"``) the static body can be served with, ``True`` for all of them.
+        conditional (bool): Whether to answer conditional (``If-None-Match``, ``If-Modified-Since``) and ``Range`` requests for the static body.
+        memoize (bool|CallbackCache): Cache the responses of a callback body, ``True`` uses a :py:class:`CallbackCache` with default settings.
         headers: Headers to inject in the faked response.
 
+    A ``dict`` or ``list`` body is encoded as JSON once, when the entry is
+    created, and served with ``content-type: application/json`` unless
+    another content type is given. Callbacks can return them as well.
+
+    When ``streaming`` is set the body can be a generator function (or any
+    re-iterable such as a list). It is called once per response to get a
+    fresh iterator, so the same entry can be served any number of times
+    without buffering previously produced chunks. Plain iterators are
+    consumed by the first response that reads them.
+
+    A :py:class:`SyntheticBody` is written from its reusable buffer with
+    a ``Content-Length`` of its size. A :py:class:`ScheduledBody` is
+    always streamed, releasing its chunks at their offsets.
+
     Returns:
         httpretty.Entry: containing the request-matching metadata.
 
@@ -957,6 +2576,10 @@ class Entry:
         forcing_headers=None,
         status=200,
         streaming=False,
+        chunked=False,
+        encodings=None,
+        conditional=False,
+        memoize=None,
         **headers,
     ):
         self.method = method
@@ -965,35 +2588,145 @@ class Entry:
         self.request = None
 
         self.body_is_callable = False
-        if callable(body):
+        self.body_is_json = False
+        self.body_factory = None
+        self.template = None
+        self.synthetic = None
+        self.scheduled = None
+        if isinstance(body, ResponseTemplate):
+            self.template = body
+            self.body = None
+        elif isinstance(body, ScheduledBody):
+            self.scheduled = body
+            self.body_factory = functools.partial(iter, body)
+            self.body = None
+            streaming = True
+            chunked = chunked or body.chunked
+        elif isinstance(body, SyntheticBody):
+            self.synthetic = body
+            self.body_factory = functools.partial(iter, body)
+            self.body = None
+        elif streaming and inspect.isgeneratorfunction(body):
+            self.body_factory = body
+            self.body = None
+        elif callable(body):
             self.callable_body = body
             self.body = None
             self.body_is_callable = True
+        elif isinstance(body, (dict, list)) and not streaming:
+            self.body = utf8(get_json_encoder()(body))
+            self.body_is_json = True
         elif isinstance(body, str):
             self.body = utf8(body)
         else:
             self.body = body
 
+        if self.template is not None:
+            self.default_content_type = self.template.content_type
+        elif self.body_is_json:
+            self.default_content_type = "application/json"
+        elif self.synthetic is not None:
+            self.default_content_type = "application/octet-stream"
+        elif self.scheduled is not None:
+            self.default_content_type = self.scheduled.content_type
+        else:
+            self.default_content_type = "text/plain; charset=utf-8"
+
+        self.body_is_static = not (
+            streaming
+            or self.body_is_callable
+            or self.template is not None
+            or self.synthetic is not None
+        )
+        # only callbacks and streaming bodies run code that can block
+        # while the response is produced, scheduled bodies wait on
+        # their releases instead
+        self.stream_may_block = streaming and self.scheduled is None
+        self.may_block = self.stream_may_block or self.body_is_callable
+        # whether the fake socket stays open for the next request once
+        # the response was read, decided when the headers are produced
+        self.keep_alive = False
         self.streaming = streaming
-        if not streaming and not self.body_is_callable:
+        self.chunked = chunked
+        if (
+            streaming
+            and self.body is not None
+            and not isinstance(self.body, bytes)
+            and iter(self.body) is not self.body
+        ):
+            self.body_factory = functools.partial(iter, self.body)
+        if self.body_is_static:
             self.body_length = len(self.body or "")
+        elif self.synthetic is not None:
+            self.body_length = self.synthetic.size
         else:
             self.body_length = 0
 
-        self.adding_headers = adding_headers or {}
-        self.forcing_headers = forcing_headers or {}
+        if encodings is True:
+            encodings = tuple(COMPRESSORS)
+        self.encodings = tuple(encodings or ())
+        # compressed variants of the body, shared by all copies of
+        # the entry made in URIMatcher.get_next_entry
+        self.encoded_bodies = {}
+
+        self.conditional = conditional
+        self.etag = None
+        self.last_modified = None
+        self.last_modified_at = None
+        if conditional and self.body_is_static:
+            self.etag = f'"{hashlib.sha1(utf8(self.body)).hexdigest()}"'
+            self.last_modified_at = datetime.now(timezone.utc).replace(microsecond=0)
+            self.last_modified = format_datetime(self.last_modified_at, usegmt=True)
+
+        if memoize is True:
+            memoize = CallbackCache()
+        self.callback_cache = memoize or None
+
+        self.adding_headers = HeadersDict(adding_headers or {})
+        self.forcing_headers = HeadersDict(forcing_headers or {})
         self.status = int(status)
 
         for k, v in headers.items():
-            name = "-".join(k.split("_")).title()
+            name = "-".join(k.split("_"))
             self.adding_headers[name] = v
 
+        # headers shared by every response of this entry, the date is
+        # the only one that needs to be computed per response
+        if self.forcing_headers:
+            self.response_headers = HeadersDict(self.forcing_headers)
+        else:
+            self.response_headers = HeadersDict(
+                status=self.status,
+                server="Python/HTTPretty",
+            )
+        self.response_headers.update(self.adding_headers)
+
         self.validate()
 
     def validate(self):
         """validates the body size with the value of the ``Content-Length``
         header
         """
+        unknown_encodings = set(self.encodings).difference(COMPRESSORS)
+        if unknown_encodings:
+            raise HTTPrettyError(
+                f"HTTPretty cannot compress response bodies with {sorted(unknown_encodings)}, "
+                f"supported encodings are {sorted(COMPRESSORS)}."
+            )
+
+        if self.encodings and not self.body_is_static:
+            raise HTTPrettyError(
+                "HTTPretty can only serve compressed variants of static response bodies."
+            )
+
+        if self.conditional and not self.body_is_static:
+            raise HTTPrettyError(
+                "HTTPretty can only answer conditional and range requests for static response bodies."
+            )
+
+        if self.callback_cache is not None and not self.body_is_callable:
+            raise HTTPrettyError("HTTPretty can only memoize callback bodies.")
+
         content_length_keys = "Content-Length", "content-length"
         for key in content_length_keys:
             got = self.adding_headers.get(key, self.forcing_headers.get(key, None))
@@ -1030,47 +2763,251 @@ class Entry:
 
         :param headers: dict
 
-        :returns: dict
+        :returns: :py:class:`HeadersDict`
         """
-        new = {}
-        for k in headers:
-            new_k = "-".join([s.lower() for s in k.split("-")])
-            new[new_k] = headers[k]
+        if isinstance(headers, HeadersDict):
+            return headers
 
-        return new
+        return HeadersDict(headers)
 
-    def fill_filekind(self, fk):
-        """writes HTTP Response data to a file descriptor
+    def negotiate_encoding(self):
+        """picks the content-coding of this entry that the request's
+        ``Accept-Encoding`` header prefers
 
-        :parm fk: a file-like object
+        :returns: the name of the content-coding or ``None`` for the identity body
+        """
+        if not self.encodings or self.request is None:
+            return None
 
-        .. warning:: **side-effect:** this method moves the cursor of the given file object to zero
+        accepted = parse_accept_encoding(self.request.headers.get("accept-encoding"))
+        chosen = None
+        quality = accepted.get("identity", 0.0)
+        for encoding in self.encodings:
+            q = accepted.get(encoding, accepted.get("*", 0.0))
+            if q > quality:
+                chosen, quality = encoding, q
+
+        return chosen
+
+    def encoded_body(self, encoding):
+        """returns the body compressed with the given content-coding,
+        compressing it only the first time it is requested
+
+        :param encoding: one of the keys of :py:data:`COMPRESSORS`
+        :returns: bytes
         """
-        now = datetime.utcnow()
+        body = self.encoded_bodies.get(encoding)
+        if body is None:
+            body = COMPRESSORS[encoding](utf8(self.body))
+            self.encoded_bodies[encoding] = body
 
-        headers = {
-            "status": self.status,
-            "date": now.strftime("%a, %d %b %Y %H:%M:%S GMT"),
-            "server": "Python/HTTPretty",
-            "connection": "close",
-        }
+        return body
 
-        if self.forcing_headers:
-            headers = self.forcing_headers
+    def is_not_modified(self, etag):
+        """evaluates the ``If-None-Match`` and ``If-Modified-Since``
+        headers of the request against the validators of this entry
+
+        :param etag: the entity-tag of the representation being served
+        :returns: bool
+        """
+        if_none_match = self.request.headers.get("if-none-match")
+        if if_none_match:
+            return etag_matches(if_none_match, etag)
+
+        if_modified_since = self.request.headers.get("if-modified-since")
+        if not if_modified_since:
+            return False
+
+        try:
+            since = parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            return False
+
+        if since.tzinfo is None:
+            since = since.replace(tzinfo=timezone.utc)
+
+        return self.last_modified_at <= since
+
+    def respond_conditionally(self, status, headers, body, etag):
+        """answers conditional and range requests from the stored body
+
+        Ranges are served from :py:class:`memoryview` slices of the
+        body, which fake sockets copy straight to the buffer of
+        ``readinto()`` calls.
+
+        :param status: the status code of the full response
+        :param headers: dict of response headers, updated in place
+        :param body: bytes of the representation being served
+        :param etag: the entity-tag of that representation
+        :returns: a 2-item tuple with the status code and the body
+                  chunks, or ``None`` to send the full body
+        """
+        headers["etag"] = etag
+        headers["last-modified"] = self.last_modified
+        headers["accept-ranges"] = "bytes"
+
+        method = getattr(self.request, "method", None)
+        if status != 200 or method not in (HttpBaseClass.GET, HttpBaseClass.HEAD):
+            return status, None
+
+        if self.is_not_modified(etag):
+            # the length of the representation, as a 200 would send it
+            headers["content-length"] = len(body)
+            return 304, ()
+
+        range_header = self.request.headers.get("range")
+        if_range = self.request.headers.get("if-range")
+        if not range_header or method != HttpBaseClass.GET:
+            return status, None
+
+        if if_range and if_range.strip() not in (etag, self.last_modified):
+            return status, None
+
+        length = len(body)
+        ranges = parse_range(range_header, length)
+        if ranges is None:
+            return status, None
+
+        if not ranges:
+            headers["content-range"] = f"bytes */{length}"
+            headers["content-length"] = 0
+            return 416, ()
+
+        view = memoryview(body)
+        if len(ranges) == 1:
+            first, last = ranges[0]
+            headers["content-range"] = f"bytes {first}-{last}/{length}"
+            headers["content-length"] = last - first + 1
+            return 206, iter_slices(view[first : last + 1], RESPONSE_CHUNK_SIZE)
+
+        boundary = "httpretty-" + etag.strip('"')[:24]
+        content_type = headers.get("content-type", self.default_content_type)
+        chunks = []
+        for first, last in ranges:
+            chunks.append(
+                utf8(
+                    f"--{boundary}\r\n"
+                    f"content-type: {content_type}\r\n"
+                    f"content-range: bytes {first}-{last}/{length}\r\n\r\n"
+                )
+            )
+            chunks.extend(iter_slices(view[first : last + 1], RESPONSE_CHUNK_SIZE))
+            chunks.append(b"\r\n")
+        chunks.append(utf8(f"--{boundary}--\r\n"))
+
+        headers["content-type"] = f"multipart/byteranges; boundary={boundary}"
+        headers["content-length"] = sum(len(chunk) for chunk in chunks)
+        return 206, chunks
+
+    def iter_body(self):
+        """returns an iterator over the chunks of a streaming body
+
+        A new iterator is created for every call when the entry was
+        registered with a body factory, otherwise the registered
+        iterator is returned as is.
+        """
+        if self.body_factory is not None:
+            return iter(self.body_factory())
+
+        if isinstance(self.body, (str, bytes)):
+            return iter((self.body,))
+
+        return iter(self.body or ())
+
+    def invoke_callback(self, headers):
+        """calls the callback body, through the :py:class:`CallbackCache`
+        when the entry is memoized
 
-        if self.adding_headers:
-            headers.update(self.normalize_headers(self.adding_headers))
+        :param headers: dict with the default response headers
+        :returns: a 3-item tuple ``(status, headers, body)``
+        """
+        uri = self.info.full_url()
+        if self.callback_cache is not None:
+            # the date belongs to this response, it is not cached
+            date = headers.pop("date", None)
+            status, headers, body = self.callback_cache.get_or_call(
+                self.callable_body, self.request, uri, headers
+            )
+            headers = self.normalize_headers(headers)
+            if date is not None:
+                headers.setdefault("date", date)
+            return status, headers, body
+
+        return self.callable_body(self.request, uri, headers)
+
+    def iter_response(self):
+        """yields HTTP Response data as chunks of bytes
+
+        Nothing is computed before the first chunk is requested. The
+        first chunk holds the status line and headers, which is when
+        callback bodies are invoked. Static bodies are sliced in
+        chunks of at most :py:data:`RESPONSE_CHUNK_SIZE` bytes and
+        streaming bodies are pulled from their iterator one chunk at
+        a time. Only the headers are yielded for ``HEAD`` requests and
+        for 1xx, 204 and 304 responses.
+        """
+        headers = HeadersDict(self.response_headers)
+        if not self.forcing_headers and "date" not in headers:
+            now = datetime.utcnow()
+            headers["date"] = now.strftime("%a, %d %b %Y %H:%M:%S GMT")
 
-        headers = self.normalize_headers(headers)
         status = headers.get("status", self.status)
         if self.body_is_callable:
-            status, headers, self.body = self.callable_body(
-                self.request, self.info.full_url(), headers
-            )
+            status, headers, self.body = self.invoke_callback(headers)
             headers = self.normalize_headers(headers)
+            if isinstance(self.body, (dict, list)):
+                self.body = utf8(get_json_encoder()(self.body))
+                headers.setdefault("content-type", "application/json")
             # TODO: document this behavior:
-            if "content-length" not in headers:
+            # streaming callbacks can return iterators, whose length
+            # isn't known, and chunked bodies announce none
+            sized = hasattr(self.body, "__len__")
+            if "content-length" not in headers and sized and not self.chunked:
                 headers.update({"content-length": len(self.body)})
+        elif self.template is not None:
+            self.body = self.template.render(
+                self.request, self.info.full_url(), self.uri
+            )
+            headers["content-length"] = len(self.body)
+        elif self.synthetic is not None:
+            headers.update(self.synthetic.checksum_headers())
+
+        body = self.body
+        etag = self.etag
+        if self.encodings:
+            vary = headers.get("vary")
+            if not vary:
+                headers["vary"] = "accept-encoding"
+            elif "accept-encoding" not in vary.lower():
+                headers["vary"] = f"{vary}, accept-encoding"
+            encoding = self.negotiate_encoding()
+            if encoding:
+                body = self.encoded_body(encoding)
+                headers["content-encoding"] = encoding
+                headers["content-length"] = len(body)
+                if etag:
+                    etag = f'{etag[:-1]}-{encoding}"'
+
+        body_chunks = None
+        if etag and self.request is not None:
+            status, body_chunks = self.respond_conditionally(
+                status, headers, utf8(body), etag
+            )
+            if "status" in headers:
+                # 304, 206 and 416 answers must not claim the status
+                # of the full response
+                headers["status"] = status
+        elif etag:
+            headers["etag"] = etag
+            headers["last-modified"] = self.last_modified
+
+        # HEAD responses keep the headers of the full response, but
+        # neither they nor 1xx, 204 and 304 responses carry a body
+        has_body = status_has_body(status)
+        send_body = has_body and (
+            getattr(self.request, "method", None) != HttpBaseClass.HEAD
+        )
+        announce_length = has_body or status == 304
 
         string_list = [
             "HTTP/1.1 %d %s" % (status, STATUSES[status]),
@@ -1079,13 +3016,24 @@ class Entry:
         if "date" in headers:
             string_list.append("date: {}".format(headers.pop("date")))
 
+        if not announce_length:
+            headers.pop("content-length", None)
+            headers.pop("transfer-encoding", None)
+        elif self.chunked:
+            # a message with transfer-encoding must not carry a content-length
+            headers.pop("content-length", None)
+            headers["transfer-encoding"] = "chunked"
+
+        self.keep_alive = self.should_keep_alive(headers, send_body)
         if not self.forcing_headers:
-            content_type = headers.pop("content-type", "text/plain; charset=utf-8")
+            headers["connection"] = "keep-alive" if self.keep_alive else "close"
+
+            content_type = headers.pop("content-type", self.default_content_type)
 
             content_length = headers.pop("content-length", self.body_length)
 
             string_list.append(f"content-type: {content_type}")
-            if not self.streaming:
+            if announce_length and not self.streaming and not self.chunked:
                 string_list.append(f"content-length: {content_length}")
 
             server = headers.pop("server", None)
@@ -1097,17 +3045,73 @@ class Entry:
                 f"{k}: {v}",
             )
 
-        for item in string_list:
-            fk.write(utf8(item) + b"\n")
+        yield b"".join(utf8(item) + b"\n" for item in string_list) + b"\r\n"
 
-        fk.write(b"\r\n")
+        if not send_body:
+            return
 
-        if self.streaming:
-            self.body, body = itertools.tee(self.body)
-            for chunk in body:
-                fk.write(utf8(chunk))
+        if body_chunks is not None:
+            chunks = body_chunks
+        elif self.streaming or self.synthetic is not None:
+            chunks = self.iter_body()
         else:
-            fk.write(utf8(self.body))
+            chunks = iter_slices(utf8(body), RESPONSE_CHUNK_SIZE)
+
+        for chunk in chunks:
+            if isinstance(chunk, threading.Event):
+                # the release of a ScheduledBody chunk, readers wait on it
+                yield chunk
+                continue
+
+            if not isinstance(chunk, memoryview):
+                chunk = utf8(chunk)
+            if self.chunked:
+                chunk = encode_chunk(chunk)
+            if chunk:
+                yield chunk
+
+        if self.chunked:
+            yield LAST_CHUNK
+
+    def should_keep_alive(self, headers, send_body):
+        """whether the connection stays open after this response: the
+        request has to ask for it, per its version and ``Connection``
+        header, and the client has to be able to tell where the body
+        ends without the connection being closed
+
+        :param headers: the :py:class:`HeadersDict` of the response
+        :param send_body: whether the response carries a body
+        """
+        if self.request is None:
+            return False
+
+        version = getattr(self.request, "request_version", "HTTP/1.0")
+        if not keeps_alive(version, self.request.headers.get("connection")):
+            return False
+
+        if "connection" in headers and not keeps_alive(
+            "HTTP/1.1", headers["connection"]
+        ):
+            return False
+
+        if not send_body or self.chunked:
+            return True
+        if self.forcing_headers:
+            return "content-length" in headers
+        return not self.streaming
+
+    def fill_filekind(self, fk):
+        """writes HTTP Response data to a file descriptor
+
+        :parm fk: a file-like object
+
+        .. warning:: **side-effect:** this method moves the cursor of the given file object to zero
+        """
+        for chunk in self.iter_response():
+            if isinstance(chunk, threading.Event):
+                chunk.wait()
+                continue
+            fk.write(chunk)
 
         fk.seek(0)
 
@@ -1284,6 +3288,8 @@ class URIMatcher:
         self.uri = uri
         # hash of current_entry pointers, per method.
         self.current_entries = {}
+        # WeightedResponses that pick the entries of a method at random
+        self.selectors = {}
 
     def matches(self, info):
         if self.info:
@@ -1308,7 +3314,12 @@ class URIMatcher:
 
     def get_next_entry(self, method, info, request):
         """Cycle through available responses, but only once.
-        Any subsequent requests will receive the last response"""
+        Any subsequent requests will receive the last response, unless
+        the method was registered with :py:class:`WeightedResponses`"""
+
+        selector = self.selectors.get(method)
+        if selector is not None:
+            return self.attach(selector.choose(), info, request)
 
         if method not in self.current_entries:
             self.current_entries[method] = 0
@@ -1327,17 +3338,13 @@ class URIMatcher:
         if self.current_entries[method] != -1:
             self.current_entries[method] += 1
 
-        # Create a copy of the original entry to make it thread-safe
-        body = entry.callable_body if entry.body_is_callable else entry.body
-        new_entry = Entry(
-            entry.method,
-            entry.uri,
-            body,
-            status=entry.status,
-            streaming=entry.streaming,
-            adding_headers=entry.adding_headers,
-            forcing_headers=entry.forcing_headers,
-        )
+        return self.attach(entry, info, request)
+
+    def attach(self, entry, info, request):
+        """copies the chosen entry for the request being answered"""
+        # Create a copy of the original entry to make it thread-safe,
+        # caches such as compressed bodies are shared with the original
+        new_entry = copy.copy(entry)
 
         # Attach more info to the entry
         # So the callback can be more clever about what to do
@@ -1624,11 +3631,11 @@ class httpretty(HttpBaseClass):
 
         :param method: one of ``httpretty.GET``, ``httpretty.PUT``, ``httpretty.POST``, ``httpretty.DELETE``, ``httpretty.HEAD``, ``httpretty.PATCH``, ``httpretty.OPTIONS``, ``httpretty.CONNECT``
         :param uri: a string or regex pattern (e.g.: **"https://httpbin.org/ip"**)
-        :param body: a string, defaults to ``{"message": "HTTPretty :)"}``
+        :param body: a string, a ``dict`` or ``list`` to be encoded as JSON or a callback, defaults to ``{"message": "HTTPretty :)"}``
         :param adding_headers: dict - headers to be added to the response
         :param forcing_headers: dict - headers to be forcefully set in the response
         :param status: an integer, defaults to **200**
-        :param responses: a list of entries, ideally each created with :py:meth:`~httpretty.core.httpretty.Response`
+        :param responses: a list of entries, ideally each created with :py:meth:`~httpretty.core.httpretty.Response`, or :py:class:`~httpretty.core.WeightedResponses` to pick one of them at random for each request
         :param priority: an integer, useful for setting higher priority over previously registered urls. defaults to zero
         :param match_querystring: bool - whether to take the querystring into account when matching an URL
         :param headers: headers to be added to the response
@@ -1640,6 +3647,12 @@ class httpretty(HttpBaseClass):
         if uri_is_string and re.search(r"^\w+://[^/]+[.]\w{2,}(:[0-9]+)?$", uri):
             uri += "/"
 
+        selector = None
+        if isinstance(responses, WeightedResponses):
+            selector = responses
+            selector.reset()
+            responses = list(selector.entries)
+
         if isinstance(responses, list) and len(responses) > 0:
             for response in responses:
                 response.uri = uri
@@ -1658,8 +3671,15 @@ class httpretty(HttpBaseClass):
         matcher = URIMatcher(uri, entries_for_this_uri, match_querystring, priority)
         if matcher in cls._entries:
             matcher.entries.extend(cls._entries[matcher])
+            previous = next(m for m in cls._entries if m == matcher)
+            matcher.selectors.update(
+                (m, s) for m, s in previous.selectors.items() if m != method
+            )
             del cls._entries[matcher]
 
+        if selector is not None:
+            matcher.selectors[method] = selector
+
         cls._entries[matcher] = entries_for_this_uri
 
     def __str__(self):
@@ -1675,6 +3695,7 @@ class httpretty(HttpBaseClass):
         forcing_headers=None,
         status=200,
         streaming=False,
+        chunked=False,
         **kw,
     ):
         """Shortcut to create an :py:class:`~httpretty.core.Entry` that takes
@@ -1691,6 +3712,7 @@ class httpretty(HttpBaseClass):
             forcing_headers (dict): Overwrite **any** response headers, even "Content-Length".
             status (int): The status code for the response, defaults to ``200``.
             streaming (bool): Whether should stream the response into chunks via generator.
+            chunked (bool): Whether to send the body with ``Transfer-Encoding: chunked`` framing.
             kwargs: Keyword-arguments are forwarded to :py:class:`~httpretty.core.Entry`
 
         Returns:
@@ -1701,6 +3723,7 @@ class httpretty(HttpBaseClass):
         kw["forcing_headers"] = forcing_headers
         kw["status"] = int(status)
         kw["streaming"] = streaming
+        kw["chunked"] = chunked
         return Entry(method, uri, **kw)
 
     @classmethod
@@ -150,3 +150,147 @@ def last_requestline(sent_data):
             pass
         else:
             return line
+
+
+def parse_accept_encoding(value):
+    """
+    Parse the value of an ``Accept-Encoding`` header into a dict
+    mapping each content-coding to its quality value
+
+    >>> parse_accept_encoding('gzip, deflate;q=0.5, br;q=0')
+    {'gzip': 1.0, 'deflate': 0.5, 'br': 0.0}
+    >>> parse_accept_encoding('')
+    {}
+    """
+    result = {}
+    for item in (value or "").split(","):
+        coding, _, params = item.partition(";")
+        coding = coding.strip().lower()
+        if not coding:
+            continue
+
+        quality = 1.0
+        for param in params.split(";"):
+            name, _, q = param.partition("=")
+            if name.strip().lower() == "q":
+                try:
+                    quality = float(q)
+                except ValueError:
+                    quality = 0.0
+
+        result[coding] = quality
+
+    return result
+
+
+def parse_range(value, length):
+    """
+    Parse the value of a ``Range`` header for a representation of
+    ``length`` bytes into a list of inclusive ``(first, last)`` byte
+    positions.
+
+    Returns ``None`` when the header should be ignored and an empty
+    list when none of the ranges can be satisfied.
+
+    >>> parse_range('bytes=0-9, 20-, -5', 100)
+    [(0, 9), (20, 99), (95, 99)]
+    >>> parse_range('bytes=200-', 100)
+    []
+    >>> parse_range('bytes=-5', 0)
+    []
+    >>> parse_range('items=0-9', 100) is None
+    True
+    """
+    unit, _, ranges = (value or "").partition("=")
+    if unit.strip().lower() != "bytes" or not ranges.strip():
+        return None
+
+    result = []
+    for spec in ranges.split(","):
+        first, dash, last = spec.strip().partition("-")
+        if not dash:
+            return None
+
+        try:
+            if not first:
+                suffix = int(last)
+                if suffix <= 0 or not length:
+                    # an empty representation has no last bytes to serve
+                    continue
+                result.append((max(length - suffix, 0), length - 1))
+                continue
+
+            first = int(first)
+            last = int(last) if last else None
+        except ValueError:
+            return None
+
+        if last is None:
+            last = length - 1
+        elif first > last:
+            return None
+
+        if first < length:
+            result.append((first, min(last, length - 1)))
+
+    return result
+
+
+def etag_matches(header_value, etag, weak=True):
+    """
+    Whether an ``If-None-Match`` or ``If-Range`` header value matches
+    the given entity-tag
+
+    >>> etag_matches('"abc", W/"def"', 'W/"def"')
+    True
+    >>> etag_matches('W/"abc"', '"abc"', weak=False)
+    False
+    >>> etag_matches('*', '"abc"')
+    True
+    """
+    if header_value.strip() == "*":
+        return True
+
+    def opaque(tag):
+        tag = tag.strip()
+        return tag[2:] if weak and tag.startswith("W/") else tag
+
+    return any(opaque(tag) == opaque(etag) for tag in header_value.split(","))
+
+
+def status_has_body(status):
+    """
+    Whether a response with the given status code may carry a body,
+    1xx, 204 and 304 responses never do
+
+    >>> status_has_body(200)
+    True
+    >>> status_has_body(101)
+    False
+    >>> status_has_body(304)
+    False
+    """
+    return not (100 <= status < 200 or status in (204, 304))
+
+
+def keeps_alive(version, connection=None):
+    """
+    Whether the connection of a request stays open after its response,
+    HTTP/1.1 connections do unless the ``Connection`` header says
+    ``close`` and HTTP/1.0 ones only when it says ``keep-alive``
+
+    >>> keeps_alive("HTTP/1.1")
+    True
+    >>> keeps_alive("HTTP/1.1", "close")
+    False
+    >>> keeps_alive("HTTP/1.0")
+    False
+    >>> keeps_alive("HTTP/1.0", "Keep-Alive")
+    True
+    """
+    tokens = {token.strip().lower() for token in (connection or "").split(",")}
+    if "close" in tokens:
+        return False
+    if "keep-alive" in tokens:
+        return True
+    return version.upper() not in ("HTTP/0.9", "HTTP/1.0")
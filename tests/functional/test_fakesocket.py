@@ -72,3 +72,108 @@ def _test_shorten_response():
         fakesocket._true_sendall('WHATEVER')
         assert fakesocket.fd.read() == (
             'a' * (httpretty.socket_buffer_size - 1))
+
+
+def test_fake_sockets_work_with_selectors():
+    u"HTTPretty should make fake sockets selectable until the response is read"
+    import selectors
+    import httpretty
+
+    httpretty.enable()
+    try:
+        httpretty.register_uri(httpretty.GET, 'http://selectable.example.com/',
+                               body=httpretty.ScheduledBody([(0, 'hello'), (0.1, 'world')],
+                                                            chunked=False))
+        connections = []
+        selector = selectors.DefaultSelector()
+        for _ in range(10):
+            connection = socket.create_connection(('selectable.example.com', 80))
+            connection.sendall(b'GET / HTTP/1.1\r\nHost: selectable.example.com\r\n\r\n')
+            response = bytearray()
+            selector.register(connection, selectors.EVENT_READ, response)
+            connections.append((connection, response))
+
+        finished = 0
+        while finished < len(connections):
+            for key, _ in selector.select(timeout=1):
+                data = key.fileobj.recv(1024)
+                if data:
+                    key.data.extend(data)
+                else:
+                    selector.unregister(key.fileobj)
+                    finished += 1
+
+        for connection, response in connections:
+            assert response.endswith(b'\n\r\nhelloworld')
+            connection.close()
+    finally:
+        httpretty.disable()
+        httpretty.reset()
+
+
+def test_fake_sockets_work_with_asyncio():
+    u"HTTPretty should let asyncio drive non-blocking fake sockets without threads"
+    import asyncio
+    import httpretty
+
+    async def fetch(loop):
+        connection = socket.socket()
+        connection.setblocking(False)
+        await loop.sock_connect(connection, ('async.example.com', 80))
+        await loop.sock_sendall(connection, b'GET / HTTP/1.1\r\nHost: async.example.com\r\n\r\n')
+        response = bytearray()
+        chunk = await loop.sock_recv(connection, 1024)
+        while chunk:
+            response.extend(chunk)
+            chunk = await loop.sock_recv(connection, 1024)
+        connection.close()
+        return bytes(response)
+
+    async def fetch_all():
+        loop = asyncio.get_running_loop()
+        return await asyncio.gather(*[fetch(loop) for _ in range(10)])
+
+    httpretty.enable()
+    try:
+        httpretty.register_uri(httpretty.GET, 'http://async.example.com/',
+                               body=httpretty.ScheduledBody([(0, 'hello'), (0.1, 'world')],
+                                                            chunked=False))
+        responses = asyncio.run(fetch_all())
+    finally:
+        httpretty.disable()
+        httpretty.reset()
+
+    assert len(responses) == 10
+    for response in responses:
+        assert response.startswith(b'HTTP/1.1 200 OK\n')
+        assert response.endswith(b'\n\r\nhelloworld')
+
+
+def test_fake_sockets_serve_slow_selecting_readers():
+    u"HTTPretty should not deadlock when events are released before a slow reader asks"
+    import select
+    import time
+    import httpretty
+
+    httpretty.enable()
+    try:
+        httpretty.register_uri(httpretty.GET, 'http://slow.example.com/',
+                               body=httpretty.ServerSentEvents([(0, 'a'), (0.01, 'b'), (0.02, 'c')]))
+        connection = socket.create_connection(('slow.example.com', 80))
+        connection.sendall(b'GET / HTTP/1.1\r\nHost: slow.example.com\r\n\r\n')
+        connection.fileno()
+
+        response = bytearray()
+        while True:
+            time.sleep(0.05)
+            select.select([connection], [], [], 1)
+            chunk = connection.recv(1024)
+            if not chunk:
+                break
+            response.extend(chunk)
+        connection.close()
+    finally:
+        httpretty.disable()
+        httpretty.reset()
+
+    assert response.endswith(b'data: a\n\n\r\n9\r\ndata: b\n\n\r\n9\r\ndata: c\n\n\r\n0\r\n\r\n')
@@ -73,7 +73,7 @@ def test_httpretty_should_mock_headers_httplib2():
     assert headers['status'] == '201'
     assert dict(headers) == {
         'content-type': 'text/plain; charset=utf-8',
-        'connection': 'close',
+        'connection': 'keep-alive',
         'content-length': '35',
         'status': '201',
         'server': 'Python/HTTPretty',
@@ -99,7 +99,7 @@ def test_httpretty_should_allow_adding_and_overwritting_httplib2():
     assert dict(headers) == {
         'content-type': 'application/json',
         'content-location': 'http://github.com/foo',
-        'connection': 'close',
+        'connection': 'keep-alive',
         'content-length': '27',
         'status': '200',
         'server': 'Apache',
@@ -152,7 +152,7 @@ def test_httpretty_should_allow_adding_and_overwritting_by_kwargs_u2():
                                                       # even if the
                                                       # server does not
                                                       # provide it
-        'connection': 'close',
+        'connection': 'keep-alive',
         'content-length': '27',
         'status': '200',
         'server': 'Apache',
@@ -99,7 +99,7 @@ def test_httpretty_should_mock_headers_requests():
 
     assert dict(response.headers) == {
         'content-type': 'text/plain; charset=utf-8',
-        'connection': 'close',
+        'connection': 'keep-alive',
         'content-length': '35',
         'status': '201',
         'server': 'Python/HTTPretty',
@@ -124,7 +124,7 @@ def test_httpretty_should_allow_adding_and_overwritting_requests():
 
     assert dict(response.headers) == {
         'content-type': 'application/json',
-        'connection': 'close',
+        'connection': 'keep-alive',
         'content-length': '27',
         'status': '200',
         'server': 'Apache',
@@ -168,7 +168,7 @@ def test_httpretty_should_allow_adding_and_overwritting_by_kwargs_u2():
 
     assert dict(response.headers) == {
         'content-type': 'application/json',
-        'connection': 'close',
+        'connection': 'keep-alive',
         'content-length': '27',
         'status': '200',
         'server': 'Apache',
@@ -375,6 +375,429 @@ def test_streaming_responses():
     assert twitter_body==twitter_expected_response_body
 
 
+@httprettified
+def test_streaming_responses_from_a_body_factory():
+    "HTTPretty should serve a streaming body factory on every request"
+
+    def lines():
+        yield b'first\r\n'
+        yield b'second\r\n'
+
+    HTTPretty.register_uri(HTTPretty.GET, "http://stream.example.com/lines",
+                           body=lines, streaming=True)
+
+    for _ in range(3):
+        response = requests.get("http://stream.example.com/lines", stream=True)
+        assert list(response.iter_lines()) == [b'first', b'second']
+
+
+@httprettified
+def test_chunked_streaming_responses():
+    "HTTPretty should frame streaming bodies with transfer-encoding: chunked"
+
+    def lines():
+        yield b'first\r\n'
+        yield b'second\r\n'
+
+    HTTPretty.register_uri(HTTPretty.GET, "http://stream.example.com/chunked",
+                           body=lines, streaming=True, chunked=True)
+
+    response = requests.get("http://stream.example.com/chunked", stream=True)
+    assert response.headers['transfer-encoding'] == 'chunked'
+    assert 'content-length' not in response.headers
+    assert list(response.iter_lines()) == [b'first', b'second']
+
+
+@httprettified
+def test_large_bodies_are_read_in_slices():
+    "HTTPretty should serve bodies larger than the response chunk size"
+
+    body = bytes(range(256)) * 4096 + b'tail'
+    HTTPretty.register_uri(HTTPretty.GET, "http://example.com/large.bin", body=body)
+
+    response = requests.get("http://example.com/large.bin", stream=True)
+    assert response.headers['content-length'] == str(len(body))
+    assert b''.join(response.iter_content(chunk_size=10000)) == body
+
+
+@httprettified
+def test_precompressed_responses():
+    "HTTPretty should serve compressed variants selected by Accept-Encoding"
+
+    body = json.dumps({'items': list(range(500))})
+    HTTPretty.register_uri(HTTPretty.GET, "http://example.com/items",
+                           body=body, encodings=('gzip', 'deflate'))
+
+    response = requests.get("http://example.com/items",
+                            headers={'Accept-Encoding': 'deflate'})
+    assert response.headers['content-encoding'] == 'deflate'
+    assert response.headers['vary'] == 'accept-encoding'
+    assert int(response.headers['content-length']) < len(body)
+    assert response.text == body
+
+    response = requests.get("http://example.com/items",
+                            headers={'Accept-Encoding': 'gzip'})
+    assert response.headers['content-encoding'] == 'gzip'
+    assert response.text == body
+
+    response = requests.get("http://example.com/items",
+                            headers={'Accept-Encoding': 'identity'})
+    assert 'content-encoding' not in response.headers
+    assert response.text == body
+
+
+@httprettified
+def test_conditional_and_range_requests():
+    "HTTPretty should answer conditional and range requests for static bodies"
+
+    body = b'0123456789' * 10
+    HTTPretty.register_uri(HTTPretty.GET, "http://example.com/file.bin",
+                           body=body, conditional=True)
+
+    response = requests.get("http://example.com/file.bin")
+    etag = response.headers['etag']
+    assert response.status_code == 200
+    assert response.headers['accept-ranges'] == 'bytes'
+    assert response.content == body
+
+    response = requests.get("http://example.com/file.bin",
+                            headers={'If-None-Match': etag})
+    assert response.status_code == 304
+    assert response.headers['status'] == '304'
+    assert response.headers['content-length'] == str(len(body))
+    assert response.content == b''
+
+    response = requests.get("http://example.com/file.bin",
+                            headers={'If-Modified-Since': response.headers['last-modified']})
+    assert response.status_code == 304
+
+    response = requests.get("http://example.com/file.bin",
+                            headers={'Range': 'bytes=95-', 'If-Range': etag})
+    assert response.status_code == 206
+    assert response.headers['status'] == '206'
+    assert response.headers['content-range'] == 'bytes 95-99/100'
+    assert response.content == b'56789'
+
+    response = requests.get("http://example.com/file.bin",
+                            headers={'Range': 'bytes=0-1,-2'})
+    assert response.status_code == 206
+    content_type = response.headers['content-type']
+    assert content_type.startswith('multipart/byteranges; boundary=')
+    boundary = content_type.split('=', 1)[1].encode()
+    assert response.content.count(b'--' + boundary) == 3
+    assert b'content-range: bytes 0-1/100\r\n\r\n01\r\n' in response.content
+    assert b'content-range: bytes 98-99/100\r\n\r\n89\r\n' in response.content
+
+    response = requests.get("http://example.com/file.bin",
+                            headers={'Range': 'bytes=500-'})
+    assert response.status_code == 416
+    assert response.headers['status'] == '416'
+    assert response.headers['content-range'] == 'bytes */100'
+
+    HTTPretty.register_uri(HTTPretty.GET, "http://example.com/empty.bin",
+                           body=b'', conditional=True)
+    response = requests.get("http://example.com/empty.bin",
+                            headers={'Range': 'bytes=-5'})
+    assert response.status_code == 416
+    assert response.headers['content-range'] == 'bytes */0'
+
+
+@httprettified
+def test_json_bodies():
+    "HTTPretty should encode dict and list bodies as JSON"
+
+    HTTPretty.register_uri(HTTPretty.GET, "http://example.com/users",
+                           body=[{'name': 'chuck'}])
+
+    def create_user(request, uri, headers):
+        return 201, headers, {'created': request.parsed_body}
+
+    HTTPretty.register_uri(HTTPretty.POST, "http://example.com/users",
+                           body=create_user)
+
+    response = requests.get("http://example.com/users")
+    assert response.headers['content-type'] == 'application/json'
+    assert response.json() == [{'name': 'chuck'}]
+
+    response = requests.post("http://example.com/users", json={'name': 'norris'})
+    assert response.status_code == 201
+    assert response.headers['content-type'] == 'application/json'
+    assert response.json() == {'created': {'name': 'norris'}}
+
+
+@httprettified
+def test_response_templates():
+    "HTTPretty should render response templates from the request"
+
+    HTTPretty.register_uri(
+        HTTPretty.GET,
+        re.compile(r"http://api.example.com/users/(?P<user_id>\d+)"),
+        body=httpretty.ResponseTemplate({
+            'id': '${path.user_id}',
+            'fields': '${query.fields}',
+            'agent': '${header.user-agent}',
+            'missing': '${query.missing}',
+        }),
+    )
+
+    response = requests.get('http://api.example.com/users/42?fields=name',
+                            headers={'User-Agent': 'tests'})
+    assert response.headers['content-type'] == 'application/json'
+    assert response.json() == {
+        'id': '42',
+        'fields': 'name',
+        'agent': 'tests',
+        'missing': '',
+    }
+
+
+@httprettified
+def test_memoized_callback_responses():
+    "HTTPretty should only call memoized callbacks once per request key"
+
+    calls = []
+
+    def sign(request, uri, headers):
+        calls.append(uri)
+        headers['x-signature'] = 'signed'
+        return 200, headers, "signature of {}".format(uri)
+
+    cache = httpretty.CallbackCache(maxsize=10)
+    HTTPretty.register_uri(HTTPretty.GET, re.compile(r"http://signer.example.com/.*"),
+                           body=sign, memoize=cache)
+
+    for _ in range(3):
+        response = requests.get("http://signer.example.com/a")
+        assert response.text == "signature of http://signer.example.com/a"
+        assert response.headers['x-signature'] == 'signed'
+
+    requests.get("http://signer.example.com/b")
+
+    assert calls == ["http://signer.example.com/a", "http://signer.example.com/b"]
+    assert cache.cache_info().hits == 2
+    assert cache.cache_info().misses == 2
+
+
+@httprettified
+def test_memoized_callback_responses_are_dated_when_sent():
+    "HTTPretty should not send the date of a cached response again"
+
+    HTTPretty.register_uri(HTTPretty.GET, "http://signer.example.com/",
+                           body=lambda request, uri, headers: (200, headers, "signed"),
+                           memoize=True)
+
+    with freeze_time("2013-10-04 04:20:00") as frozen:
+        first = requests.get("http://signer.example.com/")
+        frozen.move_to("2013-10-05 04:20:00")
+        second = requests.get("http://signer.example.com/")
+
+    assert first.headers['date'] == 'Fri, 04 Oct 2013 04:20:00 GMT'
+    assert second.headers['date'] == 'Sat, 05 Oct 2013 04:20:00 GMT'
+    assert second.text == 'signed'
+
+
+@httprettified
+def test_head_and_no_content_responses_skip_the_body():
+    "HTTPretty should not produce bodies for HEAD requests and 204 responses"
+
+    produced = []
+
+    def download():
+        produced.append(True)
+        yield b'x' * 1024
+
+    HTTPretty.register_uri(HTTPretty.HEAD, "http://files.example.com/big.bin",
+                           body=download, streaming=True)
+    HTTPretty.register_uri(HTTPretty.HEAD, "http://files.example.com/small.txt",
+                           body="twelve bytes")
+    HTTPretty.register_uri(HTTPretty.DELETE, "http://files.example.com/small.txt",
+                           body="ignored", status=204)
+
+    assert requests.head("http://files.example.com/big.bin").status_code == 200
+    response = requests.head("http://files.example.com/small.txt")
+    assert response.headers['content-length'] == '12'
+    assert response.content == b''
+
+    response = requests.delete("http://files.example.com/small.txt")
+    assert response.status_code == 204
+    assert response.content == b''
+    assert 'content-length' not in response.headers
+    assert produced == []
+
+
+@httprettified
+def test_synthetic_bodies():
+    "HTTPretty should serve large synthetic bodies from a reusable buffer"
+
+    HTTPretty.register_uri(HTTPretty.GET, "http://files.example.com/random.bin",
+                           body=httpretty.SyntheticBody(3 * 1024 * 1024, seed=1,
+                                                        checksum="md5"))
+
+    response = requests.get("http://files.example.com/random.bin", stream=True)
+    received = 0
+    for chunk in response.iter_content(chunk_size=256 * 1024):
+        received += len(chunk)
+
+    assert received == 3 * 1024 * 1024
+    assert response.headers['content-length'] == str(3 * 1024 * 1024)
+    assert response.headers['digest'].startswith('MD5=')
+
+
+@httprettified
+def test_weighted_responses():
+    "HTTPretty should mix registered responses according to their weights"
+
+    def statuses(count):
+        return [requests.get("http://flaky.example.com/").status_code for _ in range(count)]
+
+    mix = httpretty.WeightedResponses([
+        (HTTPretty.Response("ok"), 90),
+        (HTTPretty.Response("unavailable", status=503), 10),
+    ], seed=2)
+    HTTPretty.register_uri(HTTPretty.GET, "http://flaky.example.com/", responses=mix)
+    HTTPretty.register_uri(HTTPretty.POST, "http://flaky.example.com/", status=201)
+
+    first = statuses(200)
+    assert requests.post("http://flaky.example.com/").status_code == 201
+    assert set(first) == {200, 503}
+
+    HTTPretty.register_uri(HTTPretty.GET, "http://flaky.example.com/", responses=mix)
+    assert statuses(200) == first
+
+
+@httprettified
+def test_server_sent_events():
+    "HTTPretty should release server-sent events at their offsets to many clients"
+
+    import threading
+    import time
+
+    HTTPretty.register_uri(HTTPretty.GET, "http://events.example.com/stream",
+                           body=httpretty.ServerSentEvents([
+                               (0, {"event": "hello", "data": "first"}),
+                               (0.2, "second"),
+                           ]))
+
+    results = []
+
+    def listen():
+        started = time.monotonic()
+        response = requests.get("http://events.example.com/stream", stream=True)
+        lines = []
+        for line in response.iter_lines(chunk_size=1):
+            lines.append(line)
+            if line == b'data: first':
+                assert time.monotonic() - started < 0.2
+        results.append((lines, time.monotonic() - started))
+
+    threads = [threading.Thread(target=listen) for _ in range(20)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(5)
+
+    assert len(results) == 20
+    for lines, elapsed in results:
+        assert lines == [b'event: hello', b'data: first', b'', b'data: second', b'']
+        assert elapsed >= 0.2
+    assert len([t for t in threading.enumerate() if t.name == 'httpretty-scheduler']) <= 1
+
+
+@httprettified
+def test_read_timeout_applies_to_every_chunk():
+    "HTTPretty should time out reads that wait too long for the next chunk"
+
+    HTTPretty.register_uri(HTTPretty.GET, "http://slow.example.com/",
+                           body=httpretty.ScheduledBody([(0, "fast"), (0.5, "slow")]))
+
+    with pytest.raises(requests.exceptions.ConnectionError, match='Read timed out'):
+        requests.get("http://slow.example.com/", timeout=(1, 0.05))
+
+    response = requests.get("http://slow.example.com/", timeout=(1, 2))
+    assert response.content == b'fastslow'
+
+
+@httprettified
+def test_read_timeout_applies_to_stalled_streaming_bodies():
+    "HTTPretty should time out reads of streaming bodies that stall between chunks"
+    import time
+
+    def stalling():
+        yield b'a'
+        time.sleep(0.5)
+        yield b'b'
+
+    HTTPretty.register_uri(HTTPretty.GET, "http://stall.example.com/",
+                           body=stalling, streaming=True)
+
+    started = time.monotonic()
+    with pytest.raises(requests.exceptions.ConnectionError, match='Read timed out'):
+        requests.get("http://stall.example.com/", timeout=(1, 0.05))
+    assert time.monotonic() - started < 0.4
+
+    response = requests.get("http://stall.example.com/", timeout=(1, 2))
+    assert response.content == b'ab'
+
+
+@httprettified
+def test_more_concurrent_callbacks_than_workers():
+    "HTTPretty should not time out callbacks while they wait for a worker"
+    import time
+    from concurrent.futures import ThreadPoolExecutor
+
+    def slow(request, uri, headers):
+        time.sleep(0.05)
+        return 200, headers, uri
+
+    HTTPretty.register_uri(HTTPretty.GET, re.compile(r"http://busy.example.com/\d+"),
+                           body=slow)
+
+    previous = httpretty.get_max_workers()
+    httpretty.set_max_workers(4)
+    try:
+        with ThreadPoolExecutor(max_workers=40) as clients:
+            responses = list(clients.map(
+                lambda index: requests.get(f"http://busy.example.com/{index}"),
+                range(40),
+            ))
+    finally:
+        httpretty.set_max_workers(previous)
+
+    assert [response.text for response in responses] == [
+        f"http://busy.example.com/{index}" for index in range(40)
+    ]
+
+
+@httprettified
+def test_sessions_reuse_kept_alive_connections():
+    "HTTPretty should serve several requests on one kept alive connection"
+
+    HTTPretty.register_uri(HTTPretty.GET, "http://pool.example.com/",
+                           body="hello")
+    HTTPretty.register_uri(HTTPretty.POST, "http://pool.example.com/echo",
+                           body=lambda request, uri, headers: (201, headers, request.body))
+
+    session = requests.Session()
+    for index in range(3):
+        response = session.get("http://pool.example.com/")
+        assert response.text == 'hello'
+        assert response.headers['connection'] == 'keep-alive'
+
+        response = session.post("http://pool.example.com/echo", data=f'body {index}')
+        assert response.text == f'body {index}'
+
+    connections = {id(request.connection) for request in httpretty.latest_requests()}
+    assert len(connections) == 1
+
+    # And the connection closes when the client asks for it
+    response = session.get("http://pool.example.com/", headers={'Connection': 'close'})
+    assert response.headers['connection'] == 'close'
+    session.get("http://pool.example.com/")
+
+    connections = {id(request.connection) for request in httpretty.latest_requests()}
+    assert len(connections) == 2
+
+
 @httprettified
 def test_multiline():
     url = 'https://httpbin.org/post'
@@ -474,6 +897,24 @@ def test_callback_response():
     assert response.text=="The POST response from https://api.yahoo.com/test_post"
 
 
+@httprettified
+def test_callback_streaming_chunked_response():
+    "HTTPretty should stream the chunks of an iterator returned by a callback"
+
+    def request_callback(request, uri, headers):
+        return 200, headers, (f"chunk {index};" for index in range(3))
+
+    HTTPretty.register_uri(HTTPretty.GET, "https://api.yahoo.com/stream",
+                           body=request_callback, streaming=True, chunked=True)
+
+    response = requests.get("https://api.yahoo.com/stream", stream=True)
+    assert response.headers['transfer-encoding'] == 'chunked'
+    assert 'content-length' not in response.headers
+    assert list(response.iter_content(chunk_size=None)) == [
+        b'chunk 0;', b'chunk 1;', b'chunk 2;'
+    ]
+
+
 @httprettified
 #@within(two=miliseconds)
 def test_callback_body_remains_callable_for_any_subsequent_requests():
@@ -6,7 +6,7 @@ import pytest
 from freezegun import freeze_time
 
 from httpretty.core import HTTPrettyRequest, FakeSSLSocket, fakesock, httpretty
-from httpretty.core import URIMatcher, URIInfo
+from httpretty.core import URIMatcher, URIInfo, FakeSockFile
 
 from unittest.mock import Mock, call, patch
 
@@ -264,6 +264,7 @@ def test_fakesock_socket_makefile(old_socket):
     # Given a fake socket that has a mocked Entry associated with it
     socket = fakesock.socket()
     socket._entry = Mock()
+    socket._entry.iter_response.return_value = iter([b'HTTP/1.1 200 OK\r\n\r\n', b'body'])
 
     # When I call makefile()
     fd = socket.makefile(mode='rw', bufsize=512)
@@ -275,8 +276,609 @@ def test_fakesock_socket_makefile(old_socket):
     # And the bufsize should have been set in the socket instance
     assert socket._bufsize == 512
 
-    # And the entry should have been filled with that filedescriptor
-    socket._entry.fill_filekind.assert_called_once_with(fd)
+    # And the filedescriptor should read the response of the entry
+    socket._entry.iter_response.assert_called_once_with()
+    assert fd.read() == b'HTTP/1.1 200 OK\r\n\r\nbody'
+
+
+def test_submit_shares_a_bounded_pool():
+    ("__internals__.submit should run work on a bounded pool of workers "
+     "and stop tracking it once finished")
+    import threading
+    import time
+    from httpretty.core import __internals__, get_max_workers, set_max_workers
+
+    previous = get_max_workers()
+    set_max_workers(1)
+    try:
+        # When I run several pieces of work
+        futures = [
+            __internals__.submit(lambda: threading.current_thread().name, 1)
+            for _ in range(3)
+        ]
+        names = [future.result(1) for future in futures]
+
+        # Then they should all run on the same worker
+        assert len(set(names)) == 1
+        assert names[0].startswith('httpretty-worker')
+
+        # And nothing should be tracked anymore
+        deadline = time.monotonic() + 1
+        while __internals__.workers.running and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert __internals__.workers.running == {}
+    finally:
+        set_max_workers(previous)
+
+
+def test_submit_starts_deadlines_when_work_runs():
+    ("__internals__.submit should not count the time work waits for a "
+     "worker against its deadline")
+    import time
+    from httpretty.core import __internals__, get_max_workers, set_max_workers
+
+    previous = get_max_workers()
+    set_max_workers(2)
+    try:
+        # When more work than workers is submitted with a short deadline
+        futures = [__internals__.submit(lambda: time.sleep(0.05), 0.1) for _ in range(10)]
+
+        # Then every piece of work should finish within its deadline
+        for future in futures:
+            assert __internals__.get_workers().wait(future, 0.1)
+        assert __internals__.overdue_work() == []
+    finally:
+        set_max_workers(previous)
+
+
+def test_submit_does_not_let_overdue_work_starve_the_pool():
+    ("__internals__.submit should run queued work while the workers "
+     "are held by work past its deadline")
+    import threading
+    from httpretty.core import __internals__, get_max_workers, set_max_workers
+
+    previous = get_max_workers()
+    set_max_workers(1)
+    release = threading.Event()
+    try:
+        # Given a worker held by work that hangs past its deadline
+        __internals__.submit(release.wait, 0.01)
+
+        # Then other work should still run
+        future = __internals__.submit(lambda: 'done', 0.1)
+        assert __internals__.get_workers().wait(future, 1)
+        assert future.result() == 'done'
+    finally:
+        release.set()
+        set_max_workers(previous)
+
+
+def test_FakeSockFile_times_out_stalled_blocking_producers():
+    ("FakeSockFile should apply the socket timeout to producers that "
+     "stall between chunks and keep the chunk they were producing")
+    import socket as stdlib_socket
+    import threading
+
+    release = threading.Event()
+
+    def stalling():
+        yield b'first'
+        release.wait(5)
+        yield b'second'
+
+    fd = FakeSockFile()
+    fd.socket = Mock(timeout=0.05)
+    fd.set_producer(stalling(), blocking=True)
+    assert fd.read1() == b'first'
+
+    # When the producer stalls past the timeout
+    with pytest.raises(stdlib_socket.timeout):
+        fd.read1()
+    assert not fd.is_readable()
+
+    # Then the chunk it was producing should be read afterwards
+    release.set()
+    assert fd.read1() == b'second'
+    assert fd.read1() == b''
+    assert fd.exhausted
+
+
+def test_FakeSockFile_keeps_stalled_streams_off_the_worker_pool():
+    ("FakeSockFile should pull streaming bodies outside of the worker "
+     "pool so that stalled streams don't hold up callbacks")
+    import threading
+    from httpretty.core import __internals__, get_max_workers, set_max_workers
+
+    release = threading.Event()
+
+    def stalling():
+        yield b'first'
+        release.wait(5)
+        yield b'second'
+
+    previous = get_max_workers()
+    set_max_workers(1)
+    try:
+        # Given more stalled streams than workers
+        files = []
+        for _ in range(3):
+            fd = FakeSockFile()
+            fd.socket = Mock(timeout=1)
+            fd.set_producer(stalling(), blocking=True)
+            assert fd.read1() == b'first'
+            assert not fd.is_readable()
+            files.append(fd)
+
+        # Then a callback should still get a worker
+        future = __internals__.submit(lambda: 'called', 0.1)
+        assert __internals__.get_workers().wait(future, 0.1)
+        assert future.result() == 'called'
+    finally:
+        release.set()
+        set_max_workers(previous)
+
+    for fd in files:
+        assert fd.read1() == b'second'
+
+
+def test_FakeSockFile_pulls_callbacks_on_the_worker_pool():
+    ("FakeSockFile should run the first pull of a callback response on "
+     "the worker pool and never call back the thread that pulls")
+    import threading
+
+    # Given a producer that is done before the pull is even submitted
+    fd = FakeSockFile()
+    fd.socket = Mock(timeout=1)
+    fd.set_producer(iter([b'headers', b'body']), calls_back=True)
+    fd._released = Mock(side_effect=lambda: threads.append(threading.current_thread()))
+    threads = []
+
+    # When it is read
+    assert fd.read1() == b'headers'
+
+    # Then the pull should have run on a worker that called back
+    assert fd._workers.name == 'httpretty-worker'
+    assert threads and threading.current_thread() not in threads
+
+    # And the body should be read inline
+    assert fd.read1() == b'body'
+    assert fd._pulling is None
+
+
+def test_cleanup_threads_reports_overdue_work(caplog):
+    ("__internals__.cleanup_threads should report the work still running "
+     "past its deadline")
+    import threading
+    import time
+    from httpretty.core import __internals__
+
+    release = threading.Event()
+    try:
+        # Given work that missed its deadline
+        __internals__.submit(release.wait, 0.01)
+        time.sleep(0.02)
+        assert len(__internals__.overdue_work()) == 1
+
+        # When the threads are cleaned up
+        with caplog.at_level('WARNING', logger='httpretty.core'):
+            __internals__.cleanup_threads()
+
+        # Then it should be reported
+        assert 'still running' in caplog.text
+        assert 'after its deadline' in caplog.text
+    finally:
+        release.set()
+
+    __internals__.submit(lambda: None, 1).result(1)
+    assert __internals__.overdue_work() == []
+
+
+def test_set_max_workers_rejects_empty_pools():
+    ("httpretty.set_max_workers() should require at least one worker")
+    from httpretty.core import set_max_workers
+
+    with pytest.raises(ValueError, match="at least one worker, got 0"):
+        set_max_workers(0)
+
+
+@patch('httpretty.core.WorkerPool.submit')
+@patch('httpretty.core.old_socket')
+def test_fakesock_socket_makefile_fills_static_entries_inline(old_socket, submit):
+    ("fakesock.socket#makefile should only start a thread for entries "
+     "that can block")
+    from httpretty.core import Entry
+
+    # Given a fake socket with a static entry
+    socket = fakesock.socket()
+    socket._entry = Entry('GET', 'http://example.com/', 'static body')
+
+    # When I call makefile()
+    fd = socket.makefile()
+
+    # Then no thread should have been created
+    assert submit.call_count == 0
+    assert fd.read().endswith(b'static body')
+
+    # And callbacks should still run in a thread
+    assert Entry('GET', 'http://example.com/', lambda *args: (200, {}, '')).may_block
+    assert Entry('GET', 'http://example.com/', [b'a'], streaming=True).may_block
+
+
+@patch('httpretty.core.old_socket')
+def test_fakesock_socket_makefile_produces_response_lazily(old_socket):
+    ("fakesock.socket#makefile should only produce the "
+     "response headers before returning")
+    produced = []
+
+    def response():
+        for chunk in (b'HTTP/1.1 200 OK\r\n\r\n', b'first', b'second'):
+            produced.append(chunk)
+            yield chunk
+
+    # Given a fake socket that has a mocked Entry associated with it
+    socket = fakesock.socket()
+    socket._entry = Mock()
+    socket._entry.iter_response.return_value = response()
+
+    # When I call makefile()
+    fd = socket.makefile(mode='rb')
+
+    # Then only the headers should have been produced
+    assert produced == [b'HTTP/1.1 200 OK\r\n\r\n']
+
+    # And the body should be produced as it gets read
+    assert fd.readline() == b'HTTP/1.1 200 OK\r\n'
+    assert fd.readline() == b'\r\n'
+    assert fd.read(3) == b'fir'
+    assert produced == [b'HTTP/1.1 200 OK\r\n\r\n', b'first']
+    assert fd.read() == b'stsecond'
+
+
+@patch('httpretty.core.old_socket')
+def test_fakesock_socket_recv_fills_response_once(old_socket):
+    ("fakesock.socket#recv should generate the response once "
+     "and read it incrementally")
+
+    # Given a fake socket that has a mocked Entry associated with it
+    socket = fakesock.socket()
+    socket._entry = Mock()
+    socket._entry.iter_response.return_value = iter([b'HTTP/1.1 200 OK\r\n\r\n', b'body'])
+
+    # When I call recv() in small chunks
+    chunks = [socket.recv(4) for _ in range(8)]
+
+    # Then the whole response should have been read in order
+    assert b''.join(chunks) == b'HTTP/1.1 200 OK\r\n\r\nbody'
+    assert chunks[-1] == b''
+
+    # And the response should have been generated only once
+    assert socket._entry.iter_response.call_count == 1
+
+
+@patch('httpretty.core.old_socket')
+def test_fakesock_socket_recv_into_reads_response_into_buffer(old_socket):
+    ("fakesock.socket#recv_into should copy the mocked response into the "
+     "caller's buffer")
+
+    # Given a fake http socket that has a mocked Entry associated with it
+    socket = fakesock.socket()
+    socket.is_http = True
+    socket._entry = Mock()
+    socket._entry.iter_response.return_value = iter([b'HTTP/1.1 200 OK\r\n\r\n', b'body'])
+
+    # When I call recv_into() with a preallocated buffer
+    buffer = bytearray(12)
+    received = []
+    count = socket.recv_into(buffer)
+    while count:
+        received.append(bytes(buffer[:count]))
+        count = socket.recv_into(memoryview(buffer), 4)
+
+    # Then each call should return at most what one chunk had left
+    assert received == [b'HTTP/1.1 200', b' OK\r', b'\n\r\n', b'body']
+
+    # And recvfrom_into should work the same way
+    socket._entry.iter_response.return_value = iter([b'again'])
+    socket.fd = FakeSockFile()
+    assert socket.recvfrom_into(buffer) == (5, None)
+
+
+@patch('httpretty.core.old_socket')
+@patch('httpretty.core.httpretty')
+def test_fakesock_socket_descriptor_readiness_follows_response(HTTPretty, old_socket):
+    ("fakesock.socket#fileno should be readable exactly when a read "
+     "would not wait")
+    import select
+    from httpretty.core import Release
+
+    HTTPretty.allow_net_connect = False
+
+    # Given a fake http socket whose response stalls after the headers
+    release = Release()
+    socket = fakesock.socket()
+    socket.is_http = True
+    socket._entry = Mock()
+    socket._entry.iter_response.return_value = iter([b'headers', release, b'body'])
+    socket._entry.may_block = False
+    socket._entry.stream_may_block = False
+    socket._entry.body_is_callable = False
+    socket._entry.keep_alive = False
+    fileno = socket.fileno()
+
+    def ready():
+        readable, writable, _ = select.select([fileno], [fileno], [], 0)
+        return bool(readable), bool(writable)
+
+    # Then the descriptor should be readable until the stall
+    assert ready() == (True, True)
+    assert socket.recv(1024) == b'headers'
+    assert ready() == (False, True)
+
+    # And become readable again once the body is released
+    release.set()
+    assert ready() == (True, True)
+    assert socket.recv(1024) == b'body'
+
+    # And stay readable at the end of the response, as the connection closes
+    assert ready() == (True, True)
+    assert socket.recv(1024) == b''
+    socket.close()
+
+
+@patch('httpretty.core.old_socket')
+@patch('httpretty.core.httpretty')
+def test_fakesock_socket_non_blocking_mode(HTTPretty, old_socket):
+    ("fakesock.socket should raise BlockingIOError instead of waiting "
+     "and accept partial sends when non-blocking")
+    from httpretty.core import Release
+
+    HTTPretty.allow_net_connect = False
+    socket = fakesock.socket()
+    socket.is_http = True
+    socket.setblocking(False)
+    socket.send_buffer_size = 4
+
+    # Given no request was sent yet
+    assert not socket.getblocking()
+    with pytest.raises(BlockingIOError):
+        socket.recv(1024)
+
+    # When the response stalls after the headers
+    release = Release()
+    socket._entry = Mock()
+    socket._entry.iter_response.return_value = iter([b'headers', release, b'body'])
+    socket._entry.may_block = False
+    socket._entry.stream_may_block = False
+    socket._entry.body_is_callable = False
+
+    # Then reads should only return what is available
+    assert socket.recv(1024) == b'headers'
+    with pytest.raises(BlockingIOError):
+        socket.recv(1024)
+    release.set()
+    assert socket.recv(1024) == b'body'
+
+    # And send should take what fits in the send buffer
+    socket.sendall = Mock()
+    assert socket.send(b'GET / HTTP/1.1') == 4
+    assert bytes(socket.sendall.call_args[0][0]) == b'GET '
+
+
+@patch('httpretty.core.old_socket')
+def test_fakesock_socket_recv_times_out_between_chunks(old_socket):
+    ("fakesock.socket#recv should apply the socket timeout to every "
+     "read that waits for a chunk")
+    import socket as stdlib_socket
+    import threading
+
+    # Given a fake socket whose response stalls after the headers
+    release = threading.Event()
+    socket = fakesock.socket()
+    socket.settimeout(0.01)
+    socket._entry = Mock()
+    socket._entry.iter_response.return_value = iter([b'headers', release, b'body'])
+
+    # When I read past the headers before the body is released
+    assert socket.recv(1024) == b'headers'
+    with pytest.raises(stdlib_socket.timeout):
+        socket.recv(1024)
+
+    # Then the next read should get the body once it is released
+    release.set()
+    assert socket.recv(1024) == b'body'
+
+
+def test_FakeSockFile_buffers_data_in_memory():
+    ("FakeSockFile should keep written data in memory and expose the "
+     "file surface used by the stdlib clients")
+
+    fd = FakeSockFile()
+    fd.write(b'HTTP/1.1 200 OK\r\nServer: real\r\n\r\nbody')
+    fd.seek(0)
+
+    assert isinstance(fd.file, io.BytesIO)
+    assert fd.peek(4).startswith(b'HTTP')
+    assert fd.readline() == b'HTTP/1.1 200 OK\r\n'
+    assert fd.readline() == b'Server: real\r\n'
+    assert fd.read() == b'\r\nbody'
+    assert fd.getvalue().endswith(b'body')
+    assert fd.fileno() > 0
+
+
+@patch('httpretty.core.old_socket')
+@patch('httpretty.core.httpretty')
+def test_fakesock_socket_creates_descriptor_lazily(HTTPretty, old_socket):
+    ("fakesock.socket should only create a descriptor when fileno() is "
+     "called and keep it for the whole connection")
+    import os
+
+    HTTPretty.allow_net_connect = False
+    socket = fakesock.socket()
+    assert socket._descriptor is None
+
+    fileno = socket.fileno()
+    os.fstat(fileno)
+    socket.fd = FakeSockFile()
+    socket.fd.socket = socket
+
+    assert socket.fd.fileno() == socket.fileno() == fileno
+
+
+@patch('httpretty.core.old_socket')
+@patch('httpretty.core.httpretty')
+def test_fakesock_socket_descriptors_are_pooled_within_budget(HTTPretty, old_socket):
+    ("fakesock.socket should return its descriptor to the pool when "
+     "closed or collected and respect the descriptor budget")
+    import errno
+    import gc
+    from httpretty.core import __internals__, set_max_descriptors
+
+    HTTPretty.allow_net_connect = False
+    gc.collect()
+    __internals__.cleanup_descriptors()
+    # descriptors still held by sockets of other tests count too
+    held = len(__internals__.descriptors)
+    set_max_descriptors(held + 2)
+    try:
+        first = fakesock.socket()
+        second = fakesock.socket()
+        fileno = first.fileno()
+        second.fileno()
+
+        with pytest.raises(OSError) as error:
+            fakesock.socket().fileno()
+        assert error.value.errno == errno.EMFILE
+
+        first.close()
+        third = fakesock.socket()
+        assert third.fileno() == fileno
+
+        del second
+        gc.collect()
+        fourth = fakesock.socket()
+        fourth.fileno()
+        assert len(__internals__.descriptors) == held + 2
+        assert len(__internals__.idle_descriptors) == 0
+    finally:
+        set_max_descriptors(None)
+        __internals__.cleanup_descriptors()
+
+
+@patch('httpretty.core.old_socket')
+@patch('httpretty.core.httpretty')
+def test_fakesock_socket_finalizer_does_not_take_the_pool_lock(HTTPretty, old_socket):
+    ("fakesock.socket#__del__ should not wait for the descriptor pool "
+     "lock, the garbage collector can run it while the lock is held")
+    import threading
+    from httpretty.core import __internals__
+
+    HTTPretty.allow_net_connect = False
+    __internals__.cleanup_descriptors()
+    socket = fakesock.socket()
+    socket.fileno()
+
+    # Given the pool lock is held, as while a descriptor is created
+    with __internals__.descriptors_lock:
+        # When the socket is finalized
+        finalizer = threading.Thread(target=socket.__del__, daemon=True)
+        finalizer.start()
+        finalizer.join(1)
+
+        # Then it should not block
+        assert not finalizer.is_alive()
+
+    # And its descriptor should be reused
+    assert socket.__dict__.get('_descriptor') is None
+    assert len(__internals__.released_descriptors) == 1
+    fakesock.socket().fileno()
+    assert len(__internals__.released_descriptors) == 0
+    __internals__.cleanup_descriptors()
+
+
+@patch('httpretty.core.old_socket')
+@patch('httpretty.core.httpretty')
+def test_cleanup_descriptors_leaves_descriptors_in_use_open(HTTPretty, old_socket):
+    ("__internals__.cleanup_descriptors should not close the descriptors "
+     "of live sockets, their numbers could be reused by new files")
+    import os
+    import select
+    from httpretty.core import __internals__
+
+    HTTPretty.allow_net_connect = False
+    __internals__.cleanup_descriptors()
+
+    # Given a socket that handed out its descriptor
+    socket = fakesock.socket()
+    socket.is_http = True
+    fileno = socket.fileno()
+
+    # When the descriptors are cleaned up, as by httpretty.reset()
+    __internals__.cleanup_descriptors()
+
+    # Then its descriptor should still be its own
+    reader, writer = os.pipe()
+    try:
+        assert fileno not in (reader, writer)
+        socket._entry = Mock()
+        socket._entry.iter_response.return_value = iter([b'body'])
+        socket._entry.may_block = False
+        socket._entry.stream_may_block = False
+        socket._entry.body_is_callable = False
+        socket._entry.keep_alive = False
+        socket.update_readiness()
+        readable, _, _ = select.select([reader, fileno], [], [], 0)
+        assert readable == [fileno]
+    finally:
+        os.close(reader)
+        os.close(writer)
+        socket.close()
+        __internals__.cleanup_descriptors()
+
+
+@patch('httpretty.core.old_socket')
+@patch('httpretty.core.httpretty')
+def test_fakesock_socket_reused_descriptors_start_unreadable(HTTPretty, old_socket):
+    ("fakesock.socket should not inherit the readiness of a pooled "
+     "descriptor")
+    import os
+    import select
+    from httpretty.core import __internals__
+
+    HTTPretty.allow_net_connect = False
+    __internals__.cleanup_descriptors()
+
+    # Given a pooled descriptor that was readable when released
+    first = fakesock.socket()
+    fileno = first.fileno()
+    os.write(first._descriptor[1], b'\0')
+    first.close()
+
+    # When a new socket reuses it
+    second = fakesock.socket()
+    assert second.fileno() == fileno
+
+    # Then it should not be readable
+    readable, _, _ = select.select([fileno], [], [], 0)
+    assert readable == []
+    second.close()
+    __internals__.cleanup_descriptors()
+
+
+def test_FakeSockFile_read_keeps_data_read_before_a_timeout():
+    ("FakeSockFile#read should not lose the data it got before timing out")
+    import socket as stdlib_socket
+    import threading
+
+    release = threading.Event()
+    fd = FakeSockFile()
+    fd.socket = Mock(timeout=0.01)
+    fd.set_producer([b'first', release, b'second'])
+
+    with pytest.raises(stdlib_socket.timeout):
+        fd.read(100)
+
+    release.set()
+    assert fd.read(100) == b'firstsecond'
 
 
 @patch('httpretty.core.old_socket')
@@ -596,6 +1198,9 @@ def test_fakesock_socket_sendall_with_body_data_with_chunked_entry(POTENTIAL_HTT
     # And that is is considered http
     socket.connect(('foo.com', 80))
 
+    # And that already sent the headers of the request
+    socket._last_requestline = b'POST /foo HTTP/1.1\r\nTransfer-Encoding: chunked\r\n\r\n'
+
     # When I try to send data
     socket.sendall(b"BLABLABLABLA")
 
@@ -603,6 +1208,27 @@ def test_fakesock_socket_sendall_with_body_data_with_chunked_entry(POTENTIAL_HTT
     assert httpretty.last_request.body == b'BLABLABLABLA'
 
 
+@patch('httpretty.core.old_socket')
+@patch('httpretty.core.httpretty')
+def test_fakesock_socket_tracks_sent_requestline_per_socket(HTTPretty, old_socket):
+    ("fakesock.socket should only remember the request line of its own "
+     "current request and forget it when closed")
+    HTTPretty.allow_net_connect = False
+    HTTPretty.match_uriinfo.return_value = (Mock(), [Mock()])
+
+    first = fakesock.socket()
+    second = fakesock.socket()
+    first.connect(('foo.com', 80))
+    first.sendall(b'GET /a HTTP/1.1\r\n\r\n')
+    first.sendall(b'GET /b HTTP/1.1\r\n\r\n')
+
+    assert first._last_requestline == b'GET /b HTTP/1.1\r\n\r\n'
+    assert second._last_requestline is None
+
+    first.close()
+    assert first._last_requestline is None
+
+
 def test_fakesock_socket_sendall_with_path_starting_with_two_slashes():
     ("fakesock.socket#sendall handles paths starting with // well")
 
@@ -666,3 +1292,49 @@ def test_URIMatcher_equality_respects_querystring():
     matcher_a = URIMatcher('http://www.foo.com/?query=true&unquery=false', None, match_querystring=True)
     matcher_b = URIMatcher('http://www.foo.com/?unquery=false&query=true', None, match_querystring=True)
     assert matcher_a == matcher_b
+
+
+def test_build_alias_table_preserves_weights():
+    ("build_alias_table should give every index its share of the probability mass")
+    from httpretty.core import build_alias_table
+
+    weights = [95, 4, 1, 0]
+    probabilities, aliases = build_alias_table(weights)
+
+    share = [0.0] * len(weights)
+    for index, probability in enumerate(probabilities):
+        share[index] += probability / len(weights)
+        share[aliases[index]] += (1 - probability) / len(weights)
+
+    assert share == pytest.approx([0.95, 0.04, 0.01, 0.0])
+
+
+def test_URIMatcher_picks_weighted_responses_reproducibly():
+    ("URIMatcher should sample the entries of WeightedResponses from the seed")
+    from httpretty.core import WeightedResponses
+
+    ok = httpretty.Response('ok', method='GET')
+    failure = httpretty.Response('failure', method='GET', status=503)
+    responses = WeightedResponses([(ok, 3), (failure, 1)], seed=123)
+    matcher = URIMatcher('http://www.foo.com/', responses.entries)
+    matcher.selectors['GET'] = responses
+    info = URIInfo.from_uri('http://www.foo.com/', None)
+
+    first = [matcher.get_next_entry('GET', info, None).status for _ in range(2000)]
+    responses.reset()
+    second = [matcher.get_next_entry('GET', info, None).status for _ in range(2000)]
+
+    assert first == second
+    assert 0.7 < first.count(200) / 2000.0 < 0.8
+
+
+def test_WeightedResponses_rejects_invalid_weights():
+    ("WeightedResponses should need a positive weight and no negative ones")
+    from httpretty.core import WeightedResponses
+    from httpretty.errors import HTTPrettyError
+
+    ok = httpretty.Response('ok')
+    with pytest.raises(HTTPrettyError):
+        WeightedResponses([(ok, 0)])
+    with pytest.raises(HTTPrettyError):
+        WeightedResponses([(ok, 2), (ok, -1)])
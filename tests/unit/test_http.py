@@ -1,6 +1,30 @@
+from httpretty.http import parse_accept_encoding
+from httpretty.http import parse_range
 from httpretty.http import parse_requestline
 
 
 def test_parse_request_line_connect():
     """parse_requestline should parse the CONNECT method appropriately"""
     assert parse_requestline("CONNECT / HTTP/1.1") == ("CONNECT", "/", "1.1")
+
+
+def test_parse_accept_encoding_quality_values():
+    """parse_accept_encoding should default quality values to 1"""
+    assert parse_accept_encoding("gzip, Deflate;q=0.5, *;q=0") == {
+        "gzip": 1.0,
+        "deflate": 0.5,
+        "*": 0.0,
+    }
+
+
+def test_parse_range_ignores_invalid_specs():
+    """parse_range should ignore Range headers it cannot understand"""
+    assert parse_range("bytes=5-2", 10) is None
+    assert parse_range("bytes=a-b", 10) is None
+    assert parse_range("bytes=8-20", 10) == [(8, 9)]
+
+
+def test_parse_range_cannot_satisfy_suffixes_of_empty_bodies():
+    """parse_range should not return a suffix range for an empty body"""
+    assert parse_range("bytes=-5", 0) == []
+    assert parse_range("bytes=-5", 3) == [(0, 2)]
@@ -208,10 +208,60 @@ def test_Entry_class_normalizes_headers():
                   host='example.com', cache_control='no-cache', x_forward_for='proxy')
 
     assert entry.adding_headers == {
-        'Host': 'example.com',
-        'Cache-Control': 'no-cache',
-        'X-Forward-For': 'proxy'
+        'host': 'example.com',
+        'cache-control': 'no-cache',
+        'x-forward-for': 'proxy'
     }
+    assert entry.adding_headers['Cache-Control'] == 'no-cache'
+
+
+def test_Entry_class_precomputes_response_headers():
+    entry = Entry(HTTPretty.GET, 'http://example.com', 'example',
+                  adding_headers={'X-Custom': 'yes', 'Server': 'mine'})
+
+    assert entry.response_headers == {
+        'status': 200,
+        'server': 'mine',
+        'x-custom': 'yes',
+    }
+
+
+def test_Entry_keeps_connections_alive_when_requested():
+    def keep_alive(requestline, headers=None, body='example', **kw):
+        entry = Entry(HTTPretty.GET, 'http://example.com', body, **kw)
+        entry.request = HTTPrettyRequest(
+            f'{requestline}\r\nHost: example.com\r\n{headers or ""}'
+        )
+        response = b''.join(entry.iter_response())
+        return entry.keep_alive, response
+
+    kept, response = keep_alive('GET / HTTP/1.1')
+    assert kept
+    assert b'\nconnection: keep-alive\n' in response
+
+    kept, response = keep_alive('GET / HTTP/1.1', 'Connection: close\r\n')
+    assert not kept
+    assert b'\nconnection: close\n' in response
+
+    assert not keep_alive('GET / HTTP/1.0')[0]
+    assert keep_alive('GET / HTTP/1.0', 'Connection: keep-alive\r\n')[0]
+    assert not keep_alive('GET / HTTP/1.1', adding_headers={'Connection': 'close'})[0]
+
+    # bodies that are only delimited by the end of the connection close it
+    assert not keep_alive('GET / HTTP/1.1', body=iter([b'a']), streaming=True)[0]
+    assert keep_alive('GET / HTTP/1.1', body=iter([b'a']), streaming=True, chunked=True)[0]
+
+
+def test_HeadersDict_is_case_insensitive():
+    headers = core.HeadersDict({'Content-Type': 'text/plain'})
+    headers['X-Foo'] = 'bar'
+    headers.update({'CONTENT-TYPE': 'application/json'})
+
+    assert dict(headers) == {'content-type': 'application/json', 'x-foo': 'bar'}
+    assert 'x-FOO' in headers
+    assert headers.pop('X-Foo') == 'bar'
+    assert headers.setdefault('Content-Length', 3) == 3
+    assert headers.get('CONTENT-LENGTH') == 3
 
 
 def test_Entry_class_counts_multibyte_characters_in_bytes():
@@ -232,6 +282,361 @@ def test_Entry_class_counts_dynamic():
     assert b'content-length: 15\n'in response
 
 
+def test_Entry_streaming_body_factory_yields_fresh_iterators():
+    produced = []
+
+    def chunks():
+        for chunk in (b'a', b'b', b'c'):
+            produced.append(chunk)
+            yield chunk
+
+    entry = Entry(HTTPretty.GET, 'http://example.com', chunks, streaming=True)
+
+    assert entry.body_factory is chunks
+    assert b''.join(entry.iter_body()) == b'abc'
+    assert b''.join(entry.iter_body()) == b'abc'
+    assert produced == [b'a', b'b', b'c', b'a', b'b', b'c']
+
+
+def test_Entry_streaming_body_reiterates_lists():
+    entry = Entry(HTTPretty.GET, 'http://example.com', [b'a', b'b'], streaming=True)
+
+    assert list(entry.iter_body()) == [b'a', b'b']
+    assert list(entry.iter_body()) == [b'a', b'b']
+
+
+def test_Entry_chunked_streaming_body_is_framed():
+    entry = Entry(HTTPretty.GET, 'http://example.com', [b'hello', b'', b'world!'],
+                  streaming=True, chunked=True)
+    buf = FakeSockFile()
+    entry.fill_filekind(buf)
+    response = buf.read()
+
+    assert b'transfer-encoding: chunked\n' in response
+    assert b'content-length' not in response
+    assert response.endswith(b'\n\r\n5\r\nhello\r\n6\r\nworld!\r\n0\r\n\r\n')
+
+
+def test_Entry_chunked_callback_drops_content_length():
+    entry = Entry(HTTPretty.GET, 'http://example.com',
+                  lambda request, uri, headers: (200, headers, 'abc'), chunked=True)
+    entry.info = URIInfo.from_uri('http://example.com', entry)
+    buf = FakeSockFile()
+    entry.fill_filekind(buf)
+    response = buf.read()
+
+    assert b'content-length' not in response
+    assert response.endswith(b'3\r\nabc\r\n0\r\n\r\n')
+
+
+def test_Entry_compresses_body_variants_once():
+    entry = Entry(HTTPretty.GET, 'http://example.com', 'hello ' * 100, encodings=True)
+    entry.request = HTTPrettyRequest('GET / HTTP/1.1\r\nAccept-Encoding: deflate;q=0.5, gzip')
+
+    assert entry.negotiate_encoding() == 'gzip'
+    assert entry.encoded_body('gzip') is entry.encoded_body('gzip')
+
+
+def test_Entry_negotiates_identity_when_no_encoding_is_accepted():
+    entry = Entry(HTTPretty.GET, 'http://example.com', 'hello', encodings=['gzip'])
+    entry.request = HTTPrettyRequest('GET / HTTP/1.1\r\nAccept-Encoding: br, gzip;q=0')
+    buf = FakeSockFile()
+    entry.fill_filekind(buf)
+    response = buf.read()
+
+    assert entry.negotiate_encoding() is None
+    assert b'vary: accept-encoding\n' in response
+    assert b'content-encoding' not in response
+    assert response.endswith(b'hello')
+
+
+def test_Entry_rejects_unknown_encodings():
+    with pytest.raises(HTTPrettyError):
+        Entry(HTTPretty.GET, 'http://example.com', 'hello', encodings=['compress'])
+
+
+def test_Entry_conditional_precomputes_strong_etag():
+    entry = Entry(HTTPretty.GET, 'http://example.com', 'hello', conditional=True)
+
+    assert entry.etag == '"aaf4c61ddcc5e8a2dabede0f3b482cd9aea9434d"'
+    assert entry.last_modified.endswith(' GMT')
+
+
+def test_Entry_conditional_answers_not_modified():
+    entry = Entry(HTTPretty.GET, 'http://example.com', 'hello', conditional=True)
+    entry.request = HTTPrettyRequest(
+        'GET / HTTP/1.1\r\nIf-None-Match: W/{}'.format(entry.etag))
+    buf = FakeSockFile()
+    entry.fill_filekind(buf)
+    response = buf.read()
+
+    assert response.startswith(b'HTTP/1.1 304 Not Modified\n')
+    # the length of the representation, never 0 (RFC 9110 section 8.6)
+    assert b'content-length: 5\n' in response
+    assert response.endswith(b'\n\r\n')
+
+
+def test_Entry_conditional_answers_range_requests():
+    entry = Entry(HTTPretty.GET, 'http://example.com', '0123456789', conditional=True)
+    entry.request = HTTPrettyRequest('GET / HTTP/1.1\r\nRange: bytes=2-4')
+    buf = FakeSockFile()
+    entry.fill_filekind(buf)
+    response = buf.read()
+
+    assert response.startswith(b'HTTP/1.1 206 Partial Content\n')
+    assert b'content-range: bytes 2-4/10\n' in response
+    assert b'content-length: 3\n' in response
+    assert response.endswith(b'\r\n234')
+
+
+def test_Entry_conditional_ranges_are_read_into_buffers_without_copies():
+    entry = Entry(HTTPretty.GET, 'http://example.com', '0123456789', conditional=True)
+    entry.request = HTTPrettyRequest('GET / HTTP/1.1\r\nRange: bytes=2-4')
+    buf = FakeSockFile()
+    buf.set_producer(entry.iter_response())
+    buf.readline()
+    while buf.readline() not in (b'\r\n', b''):
+        pass
+
+    # the range is buffered as a slice of the body
+    assert buf.peek() == b'234'
+    assert isinstance(buf._chunk, memoryview)
+    target = bytearray(3)
+    assert buf.readinto(target) == 3
+    assert target == b'234'
+
+
+def test_Entry_conditional_rejects_callable_bodies():
+    with pytest.raises(HTTPrettyError):
+        Entry(HTTPretty.GET, 'http://example.com', lambda *args: (200, {}, ''),
+              conditional=True)
+
+
+def test_Entry_head_request_sends_headers_only():
+    produced = []
+
+    def chunks():
+        produced.append(True)
+        yield b'never sent'
+
+    entry = Entry(HTTPretty.HEAD, 'http://example.com', 'hello world')
+    entry.request = HTTPrettyRequest('HEAD / HTTP/1.1\r\n')
+    streaming = Entry(HTTPretty.HEAD, 'http://example.com', chunks, streaming=True)
+    streaming.request = entry.request
+
+    response = b''.join(entry.iter_response())
+    streamed = b''.join(streaming.iter_response())
+
+    assert b'content-length: 11\n' in response
+    assert response.endswith(b'\n\r\n')
+    assert streamed.endswith(b'\n\r\n')
+    assert produced == []
+
+
+@pytest.mark.parametrize('status', [101, 204])
+def test_Entry_bodiless_status_drops_framing_headers(status):
+    entry = Entry(HTTPretty.GET, 'http://example.com', 'hello', status=status,
+                  chunked=True)
+    response = b''.join(entry.iter_response())
+
+    assert b'content-length' not in response
+    assert b'transfer-encoding' not in response
+    assert response.endswith(b'\n\r\n')
+
+
+def test_Entry_not_modified_status_keeps_content_length():
+    entry = Entry(HTTPretty.GET, 'http://example.com', 'hello', status=304)
+    response = b''.join(entry.iter_response())
+
+    assert b'content-length: 5\n' in response
+    assert response.endswith(b'\n\r\n')
+
+
+def test_Entry_encodes_json_bodies_once():
+    encoded = []
+
+    def encoder(obj):
+        encoded.append(obj)
+        return json.dumps(obj, separators=(',', ':'))
+
+    httpretty.set_json_encoder(encoder)
+    try:
+        entry = Entry(HTTPretty.GET, 'http://example.com', {'hello': ['world']})
+    finally:
+        httpretty.set_json_encoder(None)
+
+    buf = FakeSockFile()
+    entry.fill_filekind(buf)
+    entry.fill_filekind(buf)
+    response = buf.read()
+
+    assert encoded == [{'hello': ['world']}]
+    assert entry.body == b'{"hello":["world"]}'
+    assert b'content-type: application/json\n' in response
+    assert b'content-length: 19\n' in response
+
+
+def test_ResponseTemplate_is_compiled_once():
+    template = httpretty.ResponseTemplate('id=${path.id} q=${query.q} ua=${header.user-agent}')
+
+    assert template.parts == [
+        ('id=', ('path', 'id')),
+        (' q=', ('query', 'q')),
+        (' ua=', ('header', 'user-agent')),
+    ]
+    assert template.tail == ''
+
+
+def test_ResponseTemplate_renders_json_skeletons():
+    template = httpretty.ResponseTemplate({'name': '${body./user/name}', 'tag': '${body./tags/1}'})
+    request = HTTPrettyRequest(
+        'POST /users HTTP/1.1\r\nContent-Type: application/json',
+        json.dumps({'user': {'name': 'chuck "the" norris'}, 'tags': ['a', 'b']}))
+
+    rendered = template.render(request)
+
+    assert template.content_type == 'application/json'
+    assert json.loads(rendered) == {'name': 'chuck "the" norris', 'tag': 'b'}
+
+
+def test_CallbackCache_evicts_least_recently_used():
+    calls = []
+
+    def callback(request, uri, headers):
+        calls.append(uri)
+        return 200, headers, uri
+
+    cache = httpretty.CallbackCache(maxsize=2)
+    request = HTTPrettyRequest('GET / HTTP/1.1')
+    for uri in ('/a', '/b', '/a', '/c', '/b'):
+        cache.get_or_call(callback, request, uri, {})
+
+    assert calls == ['/a', '/b', '/c', '/b']
+    assert cache.cache_info() == (1, 4, 2, 0, 2, 2)
+
+
+def test_CallbackCache_expires_after_ttl():
+    cache = httpretty.CallbackCache(ttl=10)
+    request = HTTPrettyRequest('GET / HTTP/1.1')
+    callback = MagicMock(return_value=(200, {}, 'body'))
+
+    with patch('httpretty.core.time.monotonic', return_value=100):
+        cache.get_or_call(callback, request, '/a', {})
+        cache.get_or_call(callback, request, '/a', {})
+
+    with patch('httpretty.core.time.monotonic', return_value=111):
+        cache.get_or_call(callback, request, '/a', {})
+
+    assert callback.call_count == 2
+    assert cache.cache_info().expirations == 1
+
+
+def test_Entry_memoize_requires_a_callback():
+    with pytest.raises(HTTPrettyError):
+        Entry(HTTPretty.GET, 'http://example.com', 'static', memoize=True)
+
+
+def test_SyntheticBody_reuses_a_single_pattern_buffer():
+    body = httpretty.SyntheticBody(10, pattern=b'abc', block_size=4)
+    chunks = list(body)
+
+    assert body.block == b'abc'
+    assert all(chunk is body.block for chunk in chunks[:-1])
+    assert b''.join(chunks) == b'abcabcabca'
+
+
+def test_SyntheticBody_seeded_content_is_reproducible():
+    first = b''.join(httpretty.SyntheticBody(100, seed=7, block_size=32))
+    second = b''.join(httpretty.SyntheticBody(100, seed=7, block_size=32))
+
+    assert len(first) == 100
+    assert first == second
+    assert first != b''.join(httpretty.SyntheticBody(100, seed=8, block_size=32))
+
+
+def test_SyntheticBody_rejects_unknown_checksums():
+    with pytest.raises(HTTPrettyError):
+        httpretty.SyntheticBody(10, checksum='crc32')
+
+
+def test_SyntheticBody_computes_its_checksum_when_created():
+    import hashlib
+    from unittest.mock import patch
+
+    body = httpretty.SyntheticBody(1000, pattern=b'xy', checksum='md5', block_size=64)
+
+    # the digest is ready before the body is served, serving doesn't hash
+    with patch.object(httpretty.SyntheticBody, 'compute_digest') as compute_digest:
+        assert body.digest() == hashlib.md5(b'xy' * 500).digest()
+        body.checksum_headers()
+    assert compute_digest.call_count == 0
+    assert httpretty.SyntheticBody(10).digest() is None
+
+
+def test_Entry_serves_synthetic_bodies_with_checksum():
+    import base64
+    import hashlib
+
+    body = httpretty.SyntheticBody(1000, pattern=b'xy', checksum='sha256', block_size=64)
+    entry = Entry(HTTPretty.GET, 'http://example.com', body)
+    entry.info = URIInfo.from_uri('http://example.com', entry)
+    response = b''.join(entry.iter_response())
+    digest = base64.b64encode(hashlib.sha256(b'xy' * 500).digest())
+
+    assert b'content-length: 1000\n' in response
+    assert b'content-type: application/octet-stream\n' in response
+    assert b'digest: SHA-256=' + digest + b'\n' in response
+    assert response.endswith(b'\r\n' + b'xy' * 500)
+
+
+def test_ServerSentEvents_encodes_events_once():
+    events = httpretty.ServerSentEvents([
+        (0, {'event': 'greeting', 'id': 1, 'data': 'hello\nworld'}),
+        (0, {'data': ['a']}),
+        (0, 'ping'),
+    ])
+
+    assert [chunk for _, chunk in events.chunks] == [
+        b'id: 1\nevent: greeting\ndata: hello\ndata: world\n\n',
+        b'data: ["a"]\n\n',
+        b'data: ping\n\n',
+    ]
+
+
+def test_Scheduler_releases_events_in_order_from_one_thread():
+    import time
+
+    scheduler = core.Scheduler()
+    now = time.monotonic()
+    late = scheduler.schedule(now + 0.2)
+    soon = scheduler.schedule(now + 0.05)
+    past = scheduler.schedule(now - 1)
+
+    assert past.is_set()
+    assert soon.wait(1) and not late.is_set()
+    assert late.wait(1)
+    assert time.monotonic() - now >= 0.2
+    thread = scheduler.thread
+    if thread is not None:
+        thread.join(1)
+    assert scheduler.thread is None
+
+
+def test_Entry_waits_for_scheduled_chunks():
+    import time
+
+    entry = Entry(HTTPretty.GET, 'http://example.com',
+                  httpretty.ScheduledBody([(0, 'first'), (0.1, 'second')]))
+    buf = FakeSockFile()
+    started = time.monotonic()
+    entry.fill_filekind(buf)
+    response = buf.read()
+
+    assert time.monotonic() - started >= 0.1
+    assert b'transfer-encoding: chunked\n' in response
+    assert response.endswith(b'5\r\nfirst\r\n6\r\nsecond\r\n0\r\n\r\n')
+
+
 def test_fake_socket_passes_through_setblocking():
     import socket
     HTTPretty.enable()